@@ -0,0 +1,68 @@
+"""
+Measures FSM storage memory for many simulated users.
+
+Every simulated user sends an update, so the storage is read as aiogram's
+FSMContextMiddleware does; a share of them starts the calorie flow and abandons it
+after the first answer.
+
+Usage:
+    python -m benchmarks.fsm_storage_memory [--users 1000000] [--flow-share 0.3]
+"""
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from states.user_state import UserState
+from storage.ttl_memory import TTLMemoryStorage
+
+BOT_ID = 42
+FIRST_USER_ID = 10 ** 9
+
+
+async def simulate(storage: BaseStorage, users: int, flow_share: float) -> None:
+    flow_every = max(1, round(1 / flow_share)) if flow_share else 0
+    for idx in range(users):
+        user_id = FIRST_USER_ID + idx
+        key = StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id)
+        await storage.get_state(key)
+        if flow_every and idx % flow_every == 0:
+            await storage.set_state(key, UserState.height)
+            await storage.update_data(key, {'age': 30})
+
+
+async def measure(name: str, storage: BaseStorage, users: int, flow_share: float) -> None:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    await simulate(storage, users, flow_share)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    records = len(storage.storage) if isinstance(storage, MemoryStorage) else storage.size
+    print(
+        f'{name:>16}: {size / 2 ** 20:8.1f} MiB, {records:8d} records, '
+        f'{size / max(records, 1):6.0f} B per record, {elapsed:5.1f}s'
+    )
+    await storage.close()
+
+
+async def main(users: int, flow_share: float) -> None:
+    print(f'{users} users, {flow_share:.0%} abandon the calorie flow')
+    await measure('MemoryStorage', MemoryStorage(), users, flow_share)
+    await measure('TTLMemoryStorage', TTLMemoryStorage(max_records=users), users, flow_share)
+    capped = TTLMemoryStorage()
+    await measure(f'  capped {capped.max_records // 1000}k', capped, users, flow_share)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--flow-share', type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.flow_share))
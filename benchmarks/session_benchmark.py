@@ -0,0 +1,126 @@
+"""
+Compares aiogram's default Bot API session with the tuned runtime profile.
+
+A fake Bot API server runs on localhost in a separate process; the bot
+sends messages to it with the given concurrency and reports sends per second and
+reply latency percentiles.
+
+Usage:
+    python -m benchmarks.session_benchmark [--requests 5000] [--concurrency 200] [--latency-ms 20] [--uvloop]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+from typing import Dict, List
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from utils.runtime import RuntimeProfile, create_session, run
+
+TOKEN = '42:BENCHMARK'
+
+FAKE_MESSAGE = {
+    'message_id': 1,
+    'date': 1700000000,
+    'chat': {'id': 1, 'type': 'private', 'first_name': 'Bench', 'username': 'bench'},
+    'from': {'id': 42, 'is_bot': True, 'first_name': 'Bot', 'username': 'bench_bot'},
+    'text': 'Ваша норма калорий: 1730.0 калорий в день.',
+    'entities': [{'type': 'bold', 'offset': 0, 'length': 19}],
+}
+
+
+def serve_fake_api(port: int, latency: float, ready: multiprocessing.Event) -> None:
+    """Serves a fake Bot API until the process is terminated."""
+
+    async def handle(request: web.Request) -> web.Response:
+        await request.read()
+        if latency:
+            await asyncio.sleep(latency)
+        return web.json_response({'ok': True, 'result': FAKE_MESSAGE})
+
+    async def serve() -> None:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def start_fake_api(port: int, latency: float) -> multiprocessing.Process:
+    """Starts the fake Bot API process and returns once it accepts connections."""
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve_fake_api, args=(port, latency, ready), daemon=True)
+    process.start()
+    ready.wait()
+    return process
+
+
+async def measure(bot: Bot, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(idx: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await bot.send_message(1, f'Message {idx}', reply_markup=None)
+            latencies.append(time.perf_counter() - started)
+
+    # Warm up the connection pool
+    await asyncio.gather(*(send(idx) for idx in range(min(concurrency, requests))))
+    latencies.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(idx) for idx in range(requests)))
+    elapsed = time.perf_counter() - started
+    await bot.session.close()
+
+    latencies.sort()
+    return {
+        'sends_per_sec': requests / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def benchmark(args: argparse.Namespace) -> None:
+    base = f'http://127.0.0.1:{args.port}'
+    # The shipped defaults, only pointed at the fake server
+    profile = RuntimeProfile(api_base=base)
+    sessions = {
+        'default': AiohttpSession(api=TelegramAPIServer.from_base(base)),
+        'tuned': create_session(profile),
+    }
+    for name, session in sessions.items():
+        result = await measure(Bot(TOKEN, session=session), args.requests, args.concurrency)
+        print(
+            f"{name:>8}: {result['sends_per_sec']:8.0f} sends/s, "
+            f"p50 {result['p50_ms']:6.1f}ms, p99 {result['p99_ms']:6.1f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='simulated Bot API response time')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--uvloop', action='store_true', help='run the client on uvloop if installed')
+    args = parser.parse_args()
+
+    server = start_fake_api(args.port, args.latency_ms / 1000)
+    try:
+        run(benchmark(args), RuntimeProfile(fast_loop=args.uvloop))
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
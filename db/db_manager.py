@@ -1,10 +1,16 @@
 import os
 import sqlite3
-from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 
 import logging
 
-logging.getLogger().setLevel(logging.INFO)
+from db.query_builder import Condition, QueryBuilder, QueryError, check_identifier
+
+logger = logging.getLogger(__name__)
+
+# Prepared statements kept per connection; templates never embed values, so they are reused
+STATEMENT_CACHE_SIZE = 256
 
 
 class DatabaseError(Exception):
@@ -22,6 +28,7 @@ class DatabaseManager:
         db_path (str): The path to the SQLite database file.
         conn (sqlite3.Connection): The SQLite connection object.
         cursor (sqlite3.Cursor): The SQLite cursor object.
+        queries (QueryBuilder): Validates identifiers and caches statement templates.
     """
 
     def __init__(self, db_name: str, db_dir: str = 'data') -> None:
@@ -36,13 +43,15 @@ class DatabaseManager:
         self.conn: sqlite3.Connection = self._connect_to_db()
         self.cursor: sqlite3.Cursor = self.conn.cursor()
         self.__db_name = db_name
+        self._in_transaction: bool = False
+        self.queries: QueryBuilder = QueryBuilder(self.conn)
         self._check_db_exists()
 
     def __del__(self) -> None:
         """Destructor to close the SQLite connection."""
         if self.conn:
             self.conn.close()
-            logging.info('Connection closed successfully.')
+            logger.debug('Connection closed successfully.')
 
     def _connect_to_db(self) -> sqlite3.Connection:
         """
@@ -52,10 +61,10 @@ class DatabaseManager:
             sqlite3.Connection: The SQLite connection object.
         """
         try:
-            return sqlite3.connect(self.db_path)
+            return sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
         except sqlite3.OperationalError:
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            return sqlite3.connect(self.db_path)
+            return sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
         except Exception as e:
             raise DatabaseError(f"Failed to connect to the database: {e}")
 
@@ -73,26 +82,108 @@ class DatabaseManager:
         """
         return {column: row[idx] for idx, column in enumerate(columns)}
 
-    def insert(self, table: str, column_values: Dict[str, Any]) -> None:
+    def insert(self, table: str, column_values: Dict[str, Any]) -> Optional[int]:
         """
         Inserts a row into the specified table.
 
         Args:
             table (str): The table name.
             column_values (Dict[str, Any]): A dictionary of column names and values to insert.
+
+        Returns:
+            Optional[int]: The ID of the inserted row.
+        """
+        try:
+            self.cursor.execute(self.queries.insert(table, list(column_values)), tuple(column_values.values()))
+            self._commit()
+            return self.cursor.lastrowid
+        except (sqlite3.Error, QueryError) as e:
+            raise DatabaseError(f"Insert operation failed: {e.args[0]}")
+
+    def insert_many(
+            self,
+            table: str,
+            columns: List[str],
+            rows: List[tuple],
+            ignore_existing: bool = False
+    ) -> None:
         """
-        columns = ', '.join(column_values.keys())
-        values = tuple(column_values.values())
-        placeholders = ", ".join("?" * len(column_values))
+        Inserts several rows into the specified table in a single transaction.
 
+        Args:
+            table (str): The table name.
+            columns (List[str]): The column names, in the order of the row values.
+            rows (List[tuple]): The rows to insert.
+            ignore_existing (bool): Skip rows that violate a uniqueness constraint.
+        """
+        if not rows:
+            return
         try:
-            self.cursor.execute(
-                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
-                values
-            )
+            self.cursor.executemany(self.queries.insert(table, columns, ignore_existing), rows)
+            self._commit()
+        except (sqlite3.Error, QueryError) as e:
+            self._rollback()
+            raise DatabaseError(f"Insert many operation failed: {e.args[0]}")
+
+    def accumulate_many(
+            self,
+            table: str,
+            key_columns: List[str],
+            value_columns: List[str],
+            rows: List[tuple]
+    ) -> None:
+        """
+        Adds the values of each row to the existing row with the same key, inserting missing rows.
+
+        Args:
+            table (str): The table name.
+            key_columns (List[str]): The columns of a unique key of the table.
+            value_columns (List[str]): The numeric columns to add to.
+            rows (List[tuple]): The key values followed by the values to add.
+        """
+        if not rows:
+            return
+        try:
+            self.cursor.executemany(self.queries.accumulate(table, key_columns, value_columns), rows)
+            self._commit()
+        except (sqlite3.Error, QueryError) as e:
+            self._rollback()
+            raise DatabaseError(f"Accumulate operation failed: {e.args[0]}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Commits the write operations made inside the block at once.
+
+        If any of them fails, all of them are rolled back. Nested blocks join the
+        outer transaction.
+        """
+        if self._in_transaction:
+            yield
+            return
+        self._in_transaction = True
+        try:
+            yield
             self.conn.commit()
         except sqlite3.Error as e:
-            raise DatabaseError(f"Insert operation failed: {e.args[0]}")
+            self._rollback()
+            raise DatabaseError(f"Transaction failed: {e.args[0]}")
+        except BaseException:
+            self._rollback()
+            raise
+        finally:
+            self._in_transaction = False
+
+    def _commit(self) -> None:
+        if not self._in_transaction:
+            self.conn.commit()
+
+    def _rollback(self) -> None:
+        # A failed rollback must not hide the error that caused it
+        try:
+            self.conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning('Rollback failed: %s', e)
 
     async def fetch_all(self, table: str, columns: List[str]) -> List[Dict[str, Any]]:
         """
@@ -105,35 +196,110 @@ class DatabaseManager:
         Returns:
             List[Dict[str, Any]]: A list of dictionaries representing the fetched rows.
         """
-        columns_str = ", ".join(columns)
         try:
-            self.cursor.execute(f"SELECT {columns_str} FROM {table}")
+            sql, params = self.queries.select(table, columns)
+            self.cursor.execute(sql, params)
             rows = self.cursor.fetchall()
             return [self._row_to_dict(row, columns) for row in rows]
-        except sqlite3.Error as e:
+        except (sqlite3.Error, QueryError) as e:
             raise DatabaseError(f"Fetch operation failed: {e.args[0]}")
 
-    def fetch_if(self, table: str, condition: str, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    def fetch_if(
+            self,
+            table: str,
+            condition: Condition,
+            columns: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Fetches all rows from the specified table, where condition is True with given columns.
 
         Args:
             table (str): The table name.
-            condition (str): The condition for fetching rows.
+            condition (Condition): The condition for fetching rows, e.g. ``{'age !=': 60}``.
             columns (List[str], optional): A list of column names to fetch. Defaults to '*'.
 
         Returns:
             List[Dict[str, Any]]: A list of dictionaries representing the fetched rows.
         """
-        columns_str = '*' if columns is None else ', '.join(columns)
         try:
-            self.cursor.execute(f"SELECT {columns_str} FROM {table} WHERE {condition}")
+            sql, params = self.queries.select(table, columns, condition)
+            self.cursor.execute(sql, params)
             rows = self.cursor.fetchall()
             col_names = [desc[0] for desc in self.cursor.description]
             return [self._row_to_dict(row, col_names) for row in rows]
-        except sqlite3.Error as e:
+        except (sqlite3.Error, QueryError) as e:
             raise DatabaseError(f"Fetch operation with condition failed: {e.args[0]}")
 
+    def fetch_last(
+            self,
+            table: str,
+            condition: Condition,
+            columns: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetches the row with the highest ID among those where condition is True.
+
+        Args:
+            table (str): The table name.
+            condition (Condition): The condition the row must satisfy.
+            columns (List[str], optional): A list of column names to fetch. Defaults to '*'.
+
+        Returns:
+            Optional[Dict[str, Any]]: The newest matching row, or None if no row matches.
+        """
+        try:
+            sql, params = self.queries.select(table, columns, condition, order_by='id', limit=True, descending=True)
+            self.cursor.execute(sql, [*params, 1])
+            row = self.cursor.fetchone()
+            if row is None:
+                return None
+            return self._row_to_dict(row, [desc[0] for desc in self.cursor.description])
+        except (sqlite3.Error, QueryError) as e:
+            raise DatabaseError(f"Fetch last operation failed: {e.args[0]}")
+
+    def iter_batches(
+            self,
+            table: str,
+            columns: List[str],
+            condition: Optional[Condition] = None,
+            batch_size: int = 500,
+            after_id: int = 0
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Streams rows from the specified table in batches ordered by ID.
+
+        Rows are read with keyset pagination (``id > last seen id``), so memory stays
+        bounded by ``batch_size`` and the iteration can be resumed from any ID.
+
+        Args:
+            table (str): The table name.
+            columns (List[str]): A list of column names to fetch. 'id' is always included.
+            condition (Condition, optional): An additional condition rows must satisfy.
+            batch_size (int): The maximum number of rows per batch.
+            after_id (int): Only rows with an ID greater than this value are returned.
+
+        Yields:
+            List[Dict[str, Any]]: The next non-empty batch of rows.
+        """
+        columns = columns if 'id' in columns else ['id', *columns]
+        condition = {'id >': after_id, **(condition or {})}
+        # A dedicated cursor keeps the shared one free for writes between batches.
+        cursor = self.conn.cursor()
+        try:
+            sql, params = self.queries.select(table, columns, condition, order_by='id', limit=True)
+            while True:
+                rows = cursor.execute(sql, [*params, batch_size]).fetchall()
+                if not rows:
+                    return
+                batch = [self._row_to_dict(row, columns) for row in rows]
+                # 'id >' is the first parameter
+                params[0] = batch[-1]['id']
+                yield batch
+        except (sqlite3.Error, QueryError) as e:
+            raise DatabaseError(f"Batch fetch operation failed: {e.args[0]}")
+        finally:
+            cursor.close()
+
     def delete(self, table: str, row_id: int) -> None:
         """
         Deletes a row from the specified table by its ID.
@@ -142,10 +308,21 @@ class DatabaseManager:
             table (str): The table name.
             row_id (int): The ID of the row to delete.
         """
+        self.delete_if(table, {'id': row_id})
+
+    def delete_if(self, table: str, condition: Condition) -> None:
+        """
+        Deletes the rows of the specified table that satisfy the condition.
+
+        Args:
+            table (str): The table name.
+            condition (Condition): The condition for deleting rows.
+        """
         try:
-            self.cursor.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
-            self.conn.commit()
-        except sqlite3.Error as e:
+            sql, params = self.queries.delete(table, condition)
+            self.cursor.execute(sql, params)
+            self._commit()
+        except (sqlite3.Error, QueryError) as e:
             raise DatabaseError(f"Delete operation failed: {e.args[0]}")
 
     def _get_cursor(self) -> sqlite3.Cursor:
@@ -157,25 +334,25 @@ class DatabaseManager:
         """
         return self.cursor
 
-    def update(self, table: str, column_values: Dict[str, Any], condition: str) -> None:
+    def update(self, table: str, column_values: Dict[str, Any], condition: Condition) -> None:
         """
         Updates rows in the specified table based on the given condition.
 
         Args:
             table (str): The table name.
             column_values (Dict[str, Any]): A dictionary of column names and values to update.
-            condition (str): The condition for updating rows.
+            condition (Condition): The condition for updating rows, e.g. ``{'id': 1}``.
         """
-        columns = ', '.join(f"{col} = ?" for col in column_values.keys())
-        values = list(column_values.values())
-        sql = f"UPDATE {table} SET {columns} WHERE {condition}"
-
         try:
-            self.cursor.execute(sql, values)
-            self.conn.commit()
-        except sqlite3.Error as e:
+            sql, params = self.queries.update(table, list(column_values), condition)
+            self.cursor.execute(sql, [*column_values.values(), *params])
+            self._commit()
+        except (sqlite3.Error, QueryError) as e:
             raise DatabaseError(f"Update operation failed: {e.args[0]}")
 
+    def _aggregate(self, table: str, function: str, column: str = '*') -> Any:
+        return self.cursor.execute(self.queries.aggregate(table, function, column)).fetchone()[0]
+
     def get_table_size(self, table: str) -> int:
         """
         Returns the number of rows in the table.
@@ -187,9 +364,8 @@ class DatabaseManager:
             int: The total number of rows.
         """
         try:
-            self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            return self.cursor.fetchone()[0]
-        except sqlite3.Error as e:
+            return self._aggregate(table, 'COUNT')
+        except (sqlite3.Error, QueryError) as e:
             raise DatabaseError(f"Get table size operation failed: {e.args[0]}")
 
     def get_column_sum(self, table: str, column: str) -> Optional[float]:
@@ -201,11 +377,11 @@ class DatabaseManager:
             column (str): The column name.
 
         Returns:
-            Optional[float]: The sum of the column values, or None if an error occurs.
+            Optional[float]: The sum of the column values, or None if the table is empty.
         """
         try:
-            return self.cursor.execute(f"SELECT SUM({column}) FROM {table}").fetchone()[0]
-        except sqlite3.Error as e:
+            return self._aggregate(table, 'SUM', column)
+        except (sqlite3.Error, QueryError) as e:
             raise DatabaseError(f"Get column sum operation failed: {e.args[0]}")
 
     def get_column_avg(self, table: str, column: str) -> Optional[float]:
@@ -217,24 +393,79 @@ class DatabaseManager:
             column (str): The column name.
 
         Returns:
-            Optional[float]: The average of the column values, or None if an error occurs.
+            Optional[float]: The average of the column values, or None if the table is empty.
         """
         try:
-            return self.cursor.execute(f"SELECT AVG({column}) FROM {table}").fetchone()[0]
-        except sqlite3.Error as e:
+            return self._aggregate(table, 'AVG', column)
+        except (sqlite3.Error, QueryError) as e:
             raise DatabaseError(f"Get column average operation failed: {e.args[0]}")
 
+    def get_column_max(self, table: str, column: str) -> Optional[Any]:
+        """
+        Returns the maximum of a specific column in the specified table.
+
+        Args:
+            table (str): The table name.
+            column (str): The column name.
+
+        Returns:
+            Optional[Any]: The largest column value, or None if the table is empty.
+        """
+        try:
+            return self._aggregate(table, 'MAX', column)
+        except (sqlite3.Error, QueryError) as e:
+            raise DatabaseError(f"Get column max operation failed: {e.args[0]}")
+
+    def add_missing_columns(self, table: str, columns: Dict[str, str]) -> None:
+        """
+        Adds columns that are missing from an existing table.
+
+        Args:
+            table (str): The table name.
+            columns (Dict[str, str]): A dictionary of column names and their SQL definitions.
+        """
+        try:
+            table = self.queries.table(table)
+            existing = {row[1] for row in self.cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+            for column, definition in columns.items():
+                if column not in existing:
+                    self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {check_identifier(column)} {definition}")
+                    logger.info('Column %s added to %s.', column, table)
+            self.conn.commit()
+            self.queries.refresh_schema()
+        except (sqlite3.Error, QueryError) as e:
+            raise DatabaseError(f"Add missing columns operation failed: {e.args[0]}")
+
+    def create_index(self, table: str, column: str) -> None:
+        """
+        Creates an index on the specified column if it does not exist.
+
+        Args:
+            table (str): The table name.
+            column (str): The column name.
+        """
+        try:
+            self.queries.columns(table, [column])
+            table_name = self.queries.table(table)
+            self.cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table.lower()}_{column} ON {table_name} ({column})"
+            )
+            self.conn.commit()
+        except (sqlite3.Error, QueryError) as e:
+            raise DatabaseError(f"Create index operation failed: {e.args[0]}")
+
     def _init_db(self) -> None:
         """
         Initializes the database by executing SQL commands from 'create_users_db.sql' file.
         """
         try:
-            print(f'Current Path: {os.getcwd()}')
+            logger.debug('Current Path: %s', os.getcwd())
             with open(f'db/sql/create_{self.__db_name}_db.sql') as fd:
                 sql = fd.read()
             self.cursor.executescript(sql)
             self.conn.commit()
-            log.info(f'Database {self.__db_name} initialized successfully!')
+            self.queries.refresh_schema()
+            logger.info('Database %s initialized successfully!', self.__db_name)
         except (FileNotFoundError, sqlite3.Error) as e:
             raise DatabaseError(f'Database initialization failed: {e}')
 
@@ -244,12 +475,14 @@ class DatabaseManager:
         """
         try:
             self.cursor.execute(
-                f"SELECT name FROM sqlite_master WHERE type='table' AND name='{self.__db_name.capitalize()}'")
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (self.__db_name.capitalize(),)
+            )
             table_exists = self.cursor.fetchall()
             if not table_exists:
-                logging.warning('Table does not exists! ')
+                logger.warning('Table %s does not exist!', self.__db_name)
                 self._init_db()
             else:
-                logging.info(f'Database {self.__db_name} exists and checked!')
+                logger.info('Database %s exists and checked!', self.__db_name)
         except sqlite3.Error as e:
             raise DatabaseError(f"Check database existence operation failed: {e.args[0]}")
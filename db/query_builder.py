@@ -0,0 +1,307 @@
+"""
+Validated, parameterised SQL for DatabaseManager.
+
+Table and column names are checked against the schema read from the database,
+values are always bound as parameters, and each statement template is compiled
+once per (table, operation, columns, conditions) and reused. Since the SQL text of
+a template never depends on values, SQLite's statement cache also reuses the
+prepared statement.
+
+Conditions are dictionaries combined with AND. A key is a column name, optionally
+followed by an operator:
+
+    {'username': 'bob'}                  -> username = ?
+    {'age !=': 60}                       -> age != ?
+    {'id in': [1, 2, 3]}                 -> id IN (?, ?, ?)
+    {'chat_id is not': None}             -> chat_id IS NOT ?
+"""
+import re
+import sqlite3
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+Condition = Dict[str, Any]
+
+OPERATORS: FrozenSet[str] = frozenset({'=', '!=', '<', '<=', '>', '>=', 'in', 'is', 'is not', 'like'})
+AGGREGATES: FrozenSet[str] = frozenset({'SUM', 'AVG', 'MIN', 'MAX', 'COUNT'})
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class QueryError(ValueError):
+    """Raised when a query refers to an unknown table, column or operator."""
+
+
+def check_identifier(name: str) -> str:
+    """
+    Checks that the name is a plain SQL identifier.
+
+    Args:
+        name (str): A table, column or index name.
+
+    Returns:
+        str: The name.
+
+    Raises:
+        QueryError: If the name contains anything but letters, digits and underscores.
+    """
+    if not IDENTIFIER.match(name):
+        raise QueryError(f'Invalid identifier: {name!r}')
+    return name
+
+
+class QueryBuilder:
+    """
+    Compiles statement templates for one SQLite connection.
+
+    Attributes:
+        conn (sqlite3.Connection): The connection whose schema is used for validation.
+    """
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+        self._schema: Optional[Dict[str, Tuple[str, FrozenSet[str]]]] = None
+        self._templates: Dict[tuple, str] = {}
+        self._conditions: Dict[Tuple[str, tuple], Tuple[str, ...]] = {}
+
+    def refresh_schema(self) -> None:
+        """Re-reads the schema, e.g. after tables or columns were added."""
+        self._schema = None
+        self._templates.clear()
+        self._conditions.clear()
+
+    def _load_schema(self) -> Dict[str, Tuple[str, FrozenSet[str]]]:
+        if self._schema is None:
+            tables = [row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            self._schema = {
+                # SQLite table names are case-insensitive
+                table.lower(): (
+                    table,
+                    frozenset(row[1] for row in self.conn.execute(f"PRAGMA table_info({check_identifier(table)})"))
+                )
+                for table in tables
+                if IDENTIFIER.match(table)
+            }
+        return self._schema
+
+    def table(self, table: str) -> str:
+        """
+        Returns the schema name of the table.
+
+        Raises:
+            QueryError: If the table does not exist.
+        """
+        try:
+            return self._load_schema()[table.lower()][0]
+        except KeyError:
+            raise QueryError(f'Unknown table: {table!r}') from None
+
+    def columns(self, table: str, columns: Iterable[str]) -> Tuple[str, ...]:
+        """
+        Returns the columns after checking that the table has all of them.
+
+        Raises:
+            QueryError: If the table or any column does not exist.
+        """
+        self.table(table)
+        known = self._load_schema()[table.lower()][1]
+        columns = tuple(columns)
+        unknown = [column for column in columns if column not in known]
+        if unknown:
+            raise QueryError(f'Unknown columns of {table!r}: {", ".join(map(repr, unknown))}')
+        return columns
+
+    @staticmethod
+    def _split_condition(key: str) -> Tuple[str, str]:
+        column, _, operator = key.strip().partition(' ')
+        operator = ' '.join(operator.lower().split()) or '='
+        if operator not in OPERATORS:
+            raise QueryError(f'Unsupported operator: {operator!r}')
+        return column, operator
+
+    def _where(self, table: str, condition: Optional[Condition]) -> Tuple[tuple, List[Any]]:
+        """
+        Returns the cache key part and the parameters of the condition.
+
+        The key holds the condition keys and the sizes of 'in' lists; the keys are
+        parsed and validated only the first time they are seen.
+        """
+        if not condition:
+            return (), []
+        keys = tuple(condition)
+        operators = self._conditions.get((table, keys))
+        if operators is None:
+            parsed = [self._split_condition(key) for key in keys]
+            self.columns(table, (column for column, _ in parsed))
+            operators = self._conditions[(table, keys)] = tuple(operator for _, operator in parsed)
+
+        params: List[Any] = []
+        sizes = []
+        for operator, value in zip(operators, condition.values()):
+            if operator == 'in':
+                values = list(value)
+                sizes.append(len(values))
+                params.extend(values)
+            else:
+                params.append(value)
+        return (keys, tuple(sizes)), params
+
+    def _where_sql(self, spec: tuple) -> str:
+        if not spec:
+            return ''
+        keys, sizes = spec
+        in_sizes = iter(sizes)
+        clauses = []
+        for key in keys:
+            column, operator = self._split_condition(key)
+            if operator == 'in':
+                clauses.append(f"{column} IN ({', '.join('?' * next(in_sizes))})")
+            else:
+                clauses.append(f'{column} {operator.upper()} ?')
+        return ' WHERE ' + ' AND '.join(clauses)
+
+    def _compile(self, key: tuple, build: Callable[[], str]) -> str:
+        sql = self._templates.get(key)
+        if sql is None:
+            sql = self._templates[key] = build()
+        return sql
+
+    def select(
+            self,
+            table: str,
+            columns: Optional[Sequence[str]] = None,
+            condition: Optional[Condition] = None,
+            order_by: Optional[str] = None,
+            limit: bool = False,
+            descending: bool = False
+    ) -> Tuple[str, List[Any]]:
+        """
+        Builds a SELECT statement.
+
+        Args:
+            table (str): The table name.
+            columns (Sequence[str], optional): The columns to fetch. Defaults to all columns.
+            condition (Condition, optional): The row filter.
+            order_by (str, optional): The column to sort by.
+            limit (bool): Append 'LIMIT ?'; the caller adds the limit to the parameters.
+            descending (bool): Sort in descending instead of ascending order.
+
+        Returns:
+            Tuple[str, List[Any]]: The SQL and its parameters.
+        """
+        columns = None if columns is None else tuple(columns)
+        spec, params = self._where(table, condition)
+
+        def build() -> str:
+            if columns is not None:
+                self.columns(table, columns)
+            if order_by is not None:
+                self.columns(table, [order_by])
+            columns_str = '*' if columns is None else ', '.join(columns)
+            sql = f'SELECT {columns_str} FROM {self.table(table)}{self._where_sql(spec)}'
+            if order_by is not None:
+                sql += f' ORDER BY {order_by}' + (' DESC' if descending else '')
+            return sql + (' LIMIT ?' if limit else '')
+
+        return self._compile(('select', table.lower(), columns, spec, order_by, limit, descending), build), params
+
+    def insert(self, table: str, columns: Sequence[str], ignore_existing: bool = False) -> str:
+        """
+        Builds an INSERT statement with one parameter per column.
+
+        Args:
+            table (str): The table name.
+            columns (Sequence[str]): The columns to insert.
+            ignore_existing (bool): Use INSERT OR IGNORE.
+
+        Returns:
+            str: The SQL.
+        """
+        columns = tuple(columns)
+
+        def build() -> str:
+            self.columns(table, columns)
+            verb = 'INSERT OR IGNORE' if ignore_existing else 'INSERT'
+            return f"{verb} INTO {self.table(table)} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+        return self._compile(('insert', table.lower(), columns, ignore_existing), build)
+
+    def accumulate(self, table: str, key_columns: Sequence[str], value_columns: Sequence[str]) -> str:
+        """
+        Builds an upsert that inserts a row or adds its values to the row with the same key.
+
+        Args:
+            table (str): The table name.
+            key_columns (Sequence[str]): The columns of a unique key, e.g. the primary key.
+            value_columns (Sequence[str]): The numeric columns to add to.
+
+        Returns:
+            str: The SQL with one parameter per key column, then per value column.
+        """
+        key_columns = tuple(key_columns)
+        value_columns = tuple(value_columns)
+
+        def build() -> str:
+            self.columns(table, (*key_columns, *value_columns))
+            columns = (*key_columns, *value_columns)
+            additions = ', '.join(f'{column} = {column} + excluded.{column}' for column in value_columns)
+            return (
+                f"INSERT INTO {self.table(table)} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {additions}"
+            )
+
+        return self._compile(('accumulate', table.lower(), key_columns, value_columns), build)
+
+    def update(self, table: str, columns: Sequence[str], condition: Condition) -> Tuple[str, List[Any]]:
+        """
+        Builds an UPDATE statement; the new values precede the condition parameters.
+
+        Returns:
+            Tuple[str, List[Any]]: The SQL and the condition parameters.
+        """
+        columns = tuple(columns)
+        spec, params = self._where(table, condition)
+
+        def build() -> str:
+            self.columns(table, columns)
+            assignments = ', '.join(f'{column} = ?' for column in columns)
+            return f'UPDATE {self.table(table)} SET {assignments}{self._where_sql(spec)}'
+
+        return self._compile(('update', table.lower(), columns, spec), build), params
+
+    def delete(self, table: str, condition: Condition) -> Tuple[str, List[Any]]:
+        """
+        Builds a DELETE statement.
+
+        Returns:
+            Tuple[str, List[Any]]: The SQL and its parameters.
+        """
+        if not condition:
+            raise QueryError('Refusing to delete without a condition.')
+        spec, params = self._where(table, condition)
+
+        def build() -> str:
+            return f'DELETE FROM {self.table(table)}{self._where_sql(spec)}'
+
+        return self._compile(('delete', table.lower(), spec), build), params
+
+    def aggregate(self, table: str, function: str, column: str = '*') -> str:
+        """
+        Builds a single-value aggregate query such as 'SELECT SUM(balance) FROM Users'.
+
+        Args:
+            table (str): The table name.
+            function (str): One of AGGREGATES.
+            column (str): The aggregated column, '*' for COUNT(*).
+
+        Returns:
+            str: The SQL.
+        """
+        function = function.upper()
+
+        def build() -> str:
+            if function not in AGGREGATES:
+                raise QueryError(f'Unsupported aggregate: {function!r}')
+            if column != '*':
+                self.columns(table, [column])
+            return f'SELECT {function}({column}) FROM {self.table(table)}'
+
+        return self._compile(('aggregate', table.lower(), function, column), build)
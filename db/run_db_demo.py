@@ -61,7 +61,7 @@ async def update_alternate_users_balance(db_manager: DatabaseManager) -> None:
     users = db_manager.fetch_all(table='users', columns=['id'])
 
     for user in await users[::2]:
-        db_manager.update(table='users', column_values={'balance': UPDATED_BALANCE}, condition=f'id = {user["id"]}')
+        db_manager.update(table='users', column_values={'balance': UPDATED_BALANCE}, condition={'id': user['id']})
 
 
 async def delete_every_nth_user(db_manager: DatabaseManager, n: int = 3) -> None:
@@ -90,7 +90,7 @@ def fetch_users_not_of_age(db_manager: DatabaseManager, age: int = 60) -> Option
     """
     return db_manager.fetch_if(
         table='users',
-        condition=f'age != {age}',
+        condition={'age !=': age},
         columns=['username', 'email', 'age', 'balance']
     )
 
@@ -0,0 +1,9 @@
+create table Broadcasts
+(
+    id           INTEGER PRIMARY KEY,
+    text         TEXT    NOT NULL,
+    status       TEXT    NOT NULL DEFAULT 'pending',
+    last_user_id INTEGER NOT NULL DEFAULT 0,
+    sent         INTEGER NOT NULL DEFAULT 0,
+    failed       INTEGER NOT NULL DEFAULT 0
+);
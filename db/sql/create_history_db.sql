@@ -0,0 +1,19 @@
+create table History
+(
+    id          INTEGER PRIMARY KEY,
+    telegram_id INTEGER NOT NULL,
+    calories    REAL    NOT NULL,
+    age         INTEGER NOT NULL,
+    height      INTEGER NOT NULL,
+    weight      INTEGER NOT NULL,
+    created_at  INTEGER NOT NULL
+);
+
+create table History_daily
+(
+    telegram_id INTEGER NOT NULL,
+    day         INTEGER NOT NULL,
+    total       REAL    NOT NULL DEFAULT 0,
+    count       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (telegram_id, day)
+) WITHOUT ROWID;
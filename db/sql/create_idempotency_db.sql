@@ -0,0 +1,5 @@
+create table Idempotency
+(
+    id  INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE
+);
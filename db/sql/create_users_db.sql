@@ -1,9 +1,13 @@
 create table Users
 (
-    id       INTEGER PRIMARY KEY,
-    username TEXT    NOT NULL,
-    email    TEXT    NOT NULL,
-    age      INTEGER,
-    balance  INTEGER NOT NULL
+    id           INTEGER PRIMARY KEY,
+    username     TEXT    NOT NULL,
+    email        TEXT    NOT NULL,
+    age          INTEGER,
+    balance      INTEGER NOT NULL,
+    chat_id      INTEGER,
+    is_reachable INTEGER NOT NULL DEFAULT 1,
+    telegram_id  INTEGER
 );
 
+create index idx_users_telegram_id on Users (telegram_id);
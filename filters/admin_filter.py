@@ -0,0 +1,29 @@
+from os import getenv
+from typing import FrozenSet, Optional
+
+from aiogram.filters import BaseFilter
+from aiogram.types import TelegramObject, User
+
+
+def load_admin_ids() -> FrozenSet[int]:
+    """
+    :return: Telegram user ids listed in the comma-separated ADMIN_IDS environment variable.
+    """
+    raw = getenv('ADMIN_IDS', '')
+    return frozenset(int(item) for item in raw.split(',') if item.strip())
+
+
+class AdminFilter(BaseFilter):
+    """
+    Passes only events sent by the bot administrators.
+
+    Unless given explicitly, admin ids are read on first use, after the environment is loaded.
+    """
+
+    def __init__(self, admin_ids: Optional[FrozenSet[int]] = None) -> None:
+        self.admin_ids = admin_ids
+
+    async def __call__(self, event: TelegramObject, event_from_user: Optional[User] = None) -> bool:
+        if self.admin_ids is None:
+            self.admin_ids = load_admin_ids()
+        return event_from_user is not None and event_from_user.id in self.admin_ids
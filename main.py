@@ -1,6 +1,3 @@
-import asyncio
-import logging
-import sys
 import types
 from os import getenv
 
@@ -8,30 +5,72 @@ from aiogram import Bot, Dispatcher, html
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.filters import CommandStart
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton
 
 from dotenv import load_dotenv
 
+from db.db_manager import DatabaseManager
+from middlewares.deduplication import UpdateDeduplicationMiddleware
+from middlewares.logging_context import LoggingContextMiddleware
+from middlewares.throttling import ThrottlingMiddleware
+from middlewares.user_profile import UserProfileMiddleware
 from resources.keyboards import main_menu_kbd
+from routers.admin_router import admin_router, resume_unfinished_broadcasts
 from routers.buying_router import buying_router
-from routers.calories_router import calorie_router
+from routers.calories_router import calorie_router, calorie_history
 from routers.errors_router import errors_router
 from routers.registration_router import registration_router
+from service.idempotency import idempotency_store
+from storage.chat_isolation import DEFAULT_MAX_CONCURRENCY, ChatEventIsolation
+from storage.ttl_memory import DEFAULT_MAX_RECORDS, DEFAULT_TTL, TTLMemoryStorage
+from utils.logging_setup import setup_logging
+from utils.profiler_server import start_profiler_server
+from utils.runtime import RuntimeProfile, create_session, run
 
 load_dotenv()
 
 TOKEN = getenv("BOT_TOKEN")
 
-dp = Dispatcher(storage=MemoryStorage())
+dp = Dispatcher(
+    storage=TTLMemoryStorage(
+        ttl=float(getenv("FSM_TTL", DEFAULT_TTL)),
+        max_records=int(getenv("FSM_MAX_RECORDS", DEFAULT_MAX_RECORDS)),
+    ),
+    # One update at a time per chat, different chats in parallel
+    events_isolation=ChatEventIsolation(
+        max_concurrency=int(getenv("UPDATES_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+    ),
+)
+
+# Remember handled updates across restarts when PERSIST_UPDATES is set
+if getenv("PERSIST_UPDATES"):
+    idempotency_store.attach(DatabaseManager('idempotency'))
+
+dp.update.outer_middleware(UpdateDeduplicationMiddleware(idempotency_store))
+dp.update.outer_middleware(LoggingContextMiddleware())
+
+throttling_middleware = ThrottlingMiddleware()
+dp.message.outer_middleware(throttling_middleware)
+dp.callback_query.outer_middleware(throttling_middleware)
+
+# Registered after throttling, so dropped updates never reach the profile lookup
+user_profile_middleware = UserProfileMiddleware(DatabaseManager('users'))
+dp.message.outer_middleware(user_profile_middleware)
+dp.callback_query.outer_middleware(user_profile_middleware)
 
 dp.include_routers(
+    admin_router,
     registration_router,
     calorie_router,
     buying_router,
     errors_router,
 )
 
+dp.startup.register(resume_unfinished_broadcasts)
+# Async hooks run on the loop thread, which owns the SQLite connections
+dp.shutdown.register(idempotency_store.close)
+dp.shutdown.register(calorie_history.close)
+
 
 @dp.message(CommandStart())
 async def start_handler(message: Message):
@@ -48,17 +87,33 @@ async def start_handler(message: Message):
     )
 
 
-async def main() -> None:
+async def main(profile: RuntimeProfile) -> None:
     """
     Initializes and starts the Telegram bot polling.
 
+    :param profile: Connection pool, timeout and JSON settings of the Bot API session.
     :return: None
     """
-    bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot = Bot(
+        token=TOKEN,
+        session=create_session(profile),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
 
-    await dp.start_polling(bot)
+    # Local profiling hook: curl 'localhost:$PROFILER_PORT/profile?seconds=10'
+    profiler_port = getenv('PROFILER_PORT')
+    profiler_runner = await start_profiler_server(int(profiler_port)) if profiler_port else None
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if profiler_runner is not None:
+            await profiler_runner.cleanup()
 
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
-    asyncio.run(main())
+    log_listener = setup_logging(level=getenv('LOG_LEVEL', 'INFO'))
+    try:
+        runtime_profile = RuntimeProfile.from_env()
+        run(main(runtime_profile), runtime_profile)
+    finally:
+        log_listener.stop()
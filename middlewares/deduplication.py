@@ -0,0 +1,29 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from service.idempotency import IdempotencyStore, idempotency_key
+
+
+class UpdateDeduplicationMiddleware(BaseMiddleware):
+    """
+    Skips updates whose ``update_id`` was already handled.
+
+    Telegram redelivers updates after a polling restart or a failed webhook call;
+    a repeat costs one in-memory lookup and never reaches the routers. Must be
+    registered as an outer middleware of ``dp.update``.
+    """
+
+    def __init__(self, store: IdempotencyStore) -> None:
+        self.store = store
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        if isinstance(event, Update) and not self.store.claim(idempotency_key('update', event.update_id)):
+            return None
+        return await handler(event, data)
@@ -0,0 +1,29 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+
+from utils.logging_setup import update_id_var, user_id_var
+
+
+class LoggingContextMiddleware(BaseMiddleware):
+    """
+    Exposes the ids of the update being handled to log records.
+
+    Must be registered as an outer middleware of ``dp.update``.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        user: Optional[User] = data.get('event_from_user')
+        update_token = update_id_var.set(event.update_id if isinstance(event, Update) else None)
+        user_token = user_id_var.set(user.id if user is not None else None)
+        try:
+            return await handler(event, data)
+        finally:
+            update_id_var.reset(update_token)
+            user_id_var.reset(user_token)
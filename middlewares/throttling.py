@@ -0,0 +1,105 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, User
+
+from utils.rate_limiter import TokenBucket
+from utils.ttl_cache import TTLCache
+
+THROTTLED_MESSAGE = 'Слишком много запросов. Пожалуйста, подождите немного.'
+
+# Token cost of an update, keyed by message text or callback data
+ROUTE_COSTS: Dict[str, float] = {
+    'Buy': 5.0,
+    'product_buying': 2.0,
+    'Calculate': 1.0,
+    'Registration': 1.0,
+}
+DEFAULT_COST = 1.0
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Drops updates from users who exceed their per-user token bucket.
+
+    Every user gets a bucket refilled at ``rate`` tokens per second up to ``burst``
+    tokens, and each update consumes the cost of its route. Buckets are kept in a
+    size-bounded LRU/TTL cache, so memory does not grow with the number of users.
+    A throttled user receives one short notice per ``notice_interval`` seconds; all
+    other excess updates are dropped without any API call.
+    """
+
+    def __init__(
+            self,
+            rate: float = 1.0,
+            burst: float = 5.0,
+            costs: Optional[Dict[str, float]] = None,
+            max_users: int = 100_000,
+            idle_ttl: float = 600.0,
+            notice_interval: float = 10.0
+    ) -> None:
+        """
+        Args:
+            rate (float): Tokens added to a user's bucket per second.
+            burst (float): The bucket size, i.e. the cost a user can spend at once.
+            costs (Dict[str, float], optional): Route costs. Defaults to ``ROUTE_COSTS``.
+            max_users (int): The maximum number of tracked users.
+            idle_ttl (float): Seconds after which an idle user's bucket is forgotten.
+            notice_interval (float): The minimal interval between throttling notices per user.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.costs = ROUTE_COSTS if costs is None else costs
+        self.notice_interval = notice_interval
+        self.buckets: TTLCache[int, TokenBucket] = TTLCache(max_users, idle_ttl)
+        self.notified: TTLCache[int, bool] = TTLCache(max_users, notice_interval)
+
+    def get_cost(self, event: TelegramObject) -> float:
+        """
+        Returns the token cost of the event's route.
+
+        Args:
+            event (TelegramObject): The incoming message or callback query.
+
+        Returns:
+            float: The route cost, ``DEFAULT_COST`` for unknown routes.
+        """
+        if isinstance(event, Message):
+            key = event.text
+        elif isinstance(event, CallbackQuery):
+            key = event.data
+        else:
+            key = None
+        return self.costs.get(key, DEFAULT_COST) if key is not None else DEFAULT_COST
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        user: Optional[User] = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
+        bucket = self.buckets.get(user.id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+        # Re-setting refreshes the idle TTL of active users
+        self.buckets.set(user.id, bucket)
+
+        if bucket.try_consume(self.get_cost(event)):
+            return await handler(event, data)
+
+        await self._notify(user.id, event)
+        return None
+
+    async def _notify(self, user_id: int, event: TelegramObject) -> None:
+        if isinstance(event, CallbackQuery):
+            # Callback queries must be answered anyway; the notice rides on that call
+            await event.answer(THROTTLED_MESSAGE if user_id not in self.notified else None)
+        elif user_id in self.notified:
+            return
+        elif isinstance(event, Message):
+            await event.answer(THROTTLED_MESSAGE)
+        self.notified.set(user_id, True)
@@ -0,0 +1,33 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User as TelegramUser
+
+from db.db_manager import DatabaseManager
+from service.users import get_user_by_telegram_id
+
+
+class UserProfileMiddleware(BaseMiddleware):
+    """
+    Injects the registered profile of the event sender as ``current_user``.
+
+    Handlers receive a ``models.user.User`` or None for unregistered senders. Profiles
+    are served from the cache in ``service.users``, so the database is queried only
+    on a cache miss, and registrations and balance updates made through
+    ``service.users`` are visible immediately.
+    """
+
+    def __init__(self, db_manager: DatabaseManager) -> None:
+        self.db_manager = db_manager
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        telegram_user: Optional[TelegramUser] = data.get('event_from_user')
+        data['current_user'] = (
+            get_user_by_telegram_id(self.db_manager, telegram_user.id) if telegram_user is not None else None
+        )
+        return await handler(event, data)
@@ -9,3 +9,6 @@ class User:
     age: int
     balance: int = 1000
     id: Optional[int] = None
+    chat_id: Optional[int] = None
+    is_reachable: bool = True
+    telegram_id: Optional[int] = None
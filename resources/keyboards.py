@@ -23,6 +23,7 @@ def inline_menu_kbd() -> InlineKeyboardMarkup:
             [
                 InlineKeyboardButton(text='Рассчитать норму калорий', callback_data='calories'),
                 InlineKeyboardButton(text='Формулы расчёта', callback_data='formulas'),
+                InlineKeyboardButton(text='Моя история', callback_data='history'),
             ]
         ]
     )
@@ -1,8 +1,21 @@
 # Constants
 CALCULATION_ERROR_MESSAGE = "Ошибка ввода данных. Пожалуйста, начните заново, введя команду 'Calories'."
-AGE_PROMPT_MESSAGE = "Введите свой возраст:"
+AGE_PROMPT_MESSAGE = "Введите свой возраст (или сразу возраст, рост и вес, например: 30 180 75):"
 HEIGHT_PROMPT_MESSAGE = "Введите свой рост:"
 WEIGHT_PROMPT_MESSAGE = "Введите свой вес:"
+CALORIE_RESULT_MESSAGE = "Ваша норма калорий: {calories} калорий в день."
+INVALID_VALUE_MESSAGES = {
+    'age': "Возраст должен быть целым числом от {low} до {high}. Попробуйте ещё раз:",
+    'height': "Рост должен быть целым числом от {low} до {high} см. Попробуйте ещё раз:",
+    'weight': "Вес должен быть целым числом от {low} до {high} кг. Попробуйте ещё раз:",
+}
+HISTORY_EMPTY_MESSAGE = "За последние 30 дней у вас нет расчётов калорий."
+HISTORY_SUMMARY_MESSAGE = (
+    "Ваша история расчётов:\n"
+    "За 7 дней: {avg_7} ({count_7} расч.)\n"
+    "За 30 дней: {avg_30} ({count_30} расч.)\n"
+    "Тренд: {trend}"
+)
 MIFFLIN_FORMULA_MESSAGE = (
     "Формула Миффлина-Сан Жеора для расчёта базового метаболизма (BMR):\n"
     "Для мужчин: BMR = 10 * вес(кг) + 6.25 * рост(см) - 5 * возраст(год) + 5\n"
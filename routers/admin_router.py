@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from functools import lru_cache
+from os import getenv
+from typing import Dict
+
+from aiogram import Bot, Router, html
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile, Message
+
+from db.db_manager import DatabaseManager
+from filters.admin_filter import AdminFilter
+from service.broadcast import DEFAULT_CONCURRENCY, DEFAULT_RATE, STATUS_DONE, STATUS_RUNNING, Broadcaster, \
+    create_broadcast, get_broadcast, get_unfinished_broadcasts
+from service.users import ensure_users_schema
+from utils.profiler import ProfilerBusyError, SamplingProfiler
+from utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_SECONDS = 10.0
+
+# Initialize router and database managers
+admin_router: Router = Router()
+admin_router.message.filter(AdminFilter())
+
+users_db: DatabaseManager = DatabaseManager('users')
+broadcasts_db: DatabaseManager = DatabaseManager('broadcasts')
+ensure_users_schema(users_db)
+
+# Keeps references to running broadcasts so they are not garbage collected
+running_broadcasts: Dict[int, asyncio.Task] = {}
+
+
+@lru_cache(maxsize=None)
+def get_broadcast_limiter() -> TokenBucket:
+    """
+    Returns the send rate limiter shared by all broadcasts, created after .env is loaded.
+
+    Returns:
+        TokenBucket: The limiter allowing BROADCAST_RATE messages per second in total.
+    """
+    return TokenBucket(float(getenv('BROADCAST_RATE', DEFAULT_RATE)))
+
+
+def start_broadcast(bot: Bot, broadcast_id: int) -> bool:
+    """
+    Runs the broadcast in a background task unless it is already running.
+
+    Args:
+        bot (Bot): The bot used to send messages.
+        broadcast_id (int): The id of the broadcast to send or resume.
+
+    Returns:
+        bool: True if a new task was started, otherwise False.
+    """
+    if broadcast_id in running_broadcasts:
+        return False
+    broadcaster = Broadcaster(
+        bot,
+        users_db,
+        broadcasts_db,
+        get_broadcast_limiter(),
+        concurrency=int(getenv('BROADCAST_CONCURRENCY', DEFAULT_CONCURRENCY))
+    )
+    task = asyncio.create_task(broadcaster.run(broadcast_id))
+    running_broadcasts[broadcast_id] = task
+
+    def on_done(finished: asyncio.Task) -> None:
+        running_broadcasts.pop(broadcast_id, None)
+        if not finished.cancelled() and finished.exception() is not None:
+            logger.error('Broadcast %s stopped.', broadcast_id, exc_info=finished.exception())
+
+    task.add_done_callback(on_done)
+    return True
+
+
+async def resume_unfinished_broadcasts(bot: Bot) -> None:
+    """
+    Resumes broadcasts interrupted by a restart. Registered as a dispatcher startup hook.
+
+    Args:
+        bot (Bot): The bot used to send messages.
+    """
+    for broadcast in get_unfinished_broadcasts(broadcasts_db):
+        logger.info('Resuming broadcast %s.', broadcast['id'])
+        start_broadcast(bot, broadcast['id'])
+
+
+@admin_router.message(Command('broadcast'))
+async def broadcast(message: Message, command: CommandObject, bot: Bot) -> None:
+    """
+    Handles '/broadcast <text>' by sending the text to every reachable registered user.
+
+    Args:
+        message (Message): The message object representing the admin's message.
+        command (CommandObject): The parsed command with the broadcast text as arguments.
+        bot (Bot): The bot used to send messages.
+    """
+    if not command.args:
+        await message.answer(html.quote('Usage: /broadcast <text>'))
+        return
+    broadcast_id = create_broadcast(broadcasts_db, command.args)
+    start_broadcast(bot, broadcast_id)
+    await message.answer(f'Broadcast {broadcast_id} started.')
+
+
+@admin_router.message(Command('broadcast_resume'))
+async def broadcast_resume(message: Message, command: CommandObject, bot: Bot) -> None:
+    """
+    Handles '/broadcast_resume <id>' by continuing an interrupted broadcast.
+
+    Args:
+        message (Message): The message object representing the admin's message.
+        command (CommandObject): The parsed command with the broadcast id as arguments.
+        bot (Bot): The bot used to send messages.
+    """
+    if not command.args or not command.args.strip().isdecimal():
+        await message.answer(html.quote('Usage: /broadcast_resume <id>'))
+        return
+    broadcast_id = int(command.args)
+    broadcast_info = get_broadcast(broadcasts_db, broadcast_id)
+    if broadcast_info is None:
+        await message.answer(f'Broadcast {broadcast_id} not found.')
+    elif broadcast_info['status'] == STATUS_DONE:
+        await message.answer(f'Broadcast {broadcast_id} has already finished.')
+    elif start_broadcast(bot, broadcast_id):
+        await message.answer(f'Broadcast {broadcast_id} resumed.')
+    else:
+        await message.answer(f'Broadcast {broadcast_id} is already running.')
+
+
+@admin_router.message(Command('broadcast_status'))
+async def broadcast_status(message: Message, command: CommandObject) -> None:
+    """
+    Handles '/broadcast_status <id>' by reporting the broadcast progress.
+
+    Args:
+        message (Message): The message object representing the admin's message.
+        command (CommandObject): The parsed command with the broadcast id as arguments.
+    """
+    if not command.args or not command.args.strip().isdecimal():
+        await message.answer(html.quote('Usage: /broadcast_status <id>'))
+        return
+    broadcast_info = get_broadcast(broadcasts_db, int(command.args))
+    if broadcast_info is None:
+        await message.answer(f'Broadcast {command.args} not found.')
+        return
+    status = broadcast_info['status']
+    if status == STATUS_RUNNING and broadcast_info['id'] not in running_broadcasts:
+        status = 'interrupted, use /broadcast_resume'
+    await message.answer(
+        f"Broadcast {broadcast_info['id']}: {status}, "
+        f"sent: {broadcast_info['sent']}, failed: {broadcast_info['failed']}, "
+        f"last user id: {broadcast_info['last_user_id']}"
+    )
+
+
+@admin_router.message(Command('profile'))
+async def profile(message: Message, command: CommandObject) -> None:
+    """
+    Handles '/profile [seconds]' by sampling the running bot and sending the hot spots
+    together with a collapsed-stack file for flame graph tools.
+
+    Args:
+        message (Message): The message object representing the admin's message.
+        command (CommandObject): The parsed command with the optional duration as arguments.
+    """
+    try:
+        seconds = float(command.args) if command.args else DEFAULT_PROFILE_SECONDS
+    except ValueError:
+        await message.answer('Usage: /profile [seconds]')
+        return
+
+    await message.answer(f'Profiling for {seconds:g}s...')
+    try:
+        report = await SamplingProfiler().run(seconds)
+    except ProfilerBusyError as e:
+        await message.answer(str(e))
+        return
+
+    await message.answer_document(FSInputFile(report.path), caption=f'{report.samples} samples')
+    await message.answer(html.quote(report.format_summary()))
@@ -6,6 +6,7 @@ from aiogram.types import FSInputFile
 from db.db_manager import DatabaseManager
 from resources.keyboards import inline_buying_menu_kbd
 from service.buying import get_all_products
+from service.idempotency import idempotency_store, idempotency_key
 
 # Constants
 IMAGE_DIRECTORY: str = 'assets/images/'
@@ -101,6 +102,11 @@ async def handle_the_deal(callback_query: types.CallbackQuery, state: FSMContext
         callback_query (types.CallbackQuery): The callback query object representing user action.
         state (FSMContext): The FSM (Finite State Machine) context object for handling states.
     """
+    # A repeated delivery of the same button press must not confirm the purchase twice
+    if not idempotency_store.claim(idempotency_key('purchase', callback_query.id)):
+        await callback_query.answer()
+        return
+
     await state.clear()
     await callback_query.message.answer(
         'Thank you for your purchase! Your balance has been updated.'
@@ -1,17 +1,22 @@
-from typing import Union
+from typing import Any, Dict, Optional, Union
 
 from aiogram import Router, types, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.types import ReplyKeyboardRemove
 
+from db.db_manager import DatabaseManager
 from resources.keyboards import inline_menu_kbd
 from resources.messages_constants import MIFFLIN_FORMULA_MESSAGE, AGE_PROMPT_MESSAGE, HEIGHT_PROMPT_MESSAGE, \
-    WEIGHT_PROMPT_MESSAGE, CALCULATION_ERROR_MESSAGE
+    WEIGHT_PROMPT_MESSAGE, CALCULATION_ERROR_MESSAGE, CALORIE_RESULT_MESSAGE, INVALID_VALUE_MESSAGES, \
+    HISTORY_EMPTY_MESSAGE, HISTORY_SUMMARY_MESSAGE
+from service.calorie_history import CalorieHistory, HistorySummary
 from states.user_state import UserState
-from utils.calories import calculate_calories
+from utils.calories import calculate_calories, parse_calorie_input, parse_value, validate_calorie_input, \
+    CalorieInputError, VALUE_RANGES
 
 calorie_router = Router()
+calorie_history = CalorieHistory(DatabaseManager('history'))
 
 
 # Prompt function
@@ -19,6 +24,57 @@ async def ask_question(message: types.Message, prompt: str) -> None:
     await message.answer(prompt, reply_markup=ReplyKeyboardRemove())
 
 
+async def ask_again(message: types.Message, error: CalorieInputError) -> None:
+    low, high = VALUE_RANGES[error.field]
+    await message.answer(INVALID_VALUE_MESSAGES[error.field].format(low=low, high=high))
+
+
+async def send_calories(message: types.Message, age: int, height: int, weight: int) -> None:
+    calories = calculate_calories(age, height, weight)
+    calorie_history.record(message.from_user.id, calories, age, height, weight)
+    await message.answer(CALORIE_RESULT_MESSAGE.format(calories=calories))
+
+
+def format_history(summary: HistorySummary) -> str:
+    def average(value: Optional[float]) -> str:
+        return '—' if value is None else f'{value:.0f} ккал'
+
+    return HISTORY_SUMMARY_MESSAGE.format(
+        avg_7=average(summary.avg_7),
+        count_7=summary.count_7,
+        avg_30=average(summary.avg_30),
+        count_30=summary.count_30,
+        trend='—' if summary.trend is None else f'{summary.trend:+.0f} ккал к среднему за 30 дней',
+    )
+
+
+async def start_step_by_step(message: types.Message, state: FSMContext) -> None:
+    await state.set_state(UserState.age)
+    await ask_question(message, AGE_PROMPT_MESSAGE)
+
+
+async def reply_with_calories(message: types.Message, values: Dict[str, str], state: FSMContext) -> None:
+    """
+    Replies with the calorie norm for the values given in a single message.
+
+    If a value is implausible, the step-by-step flow is started instead.
+    """
+    try:
+        age, height, weight = validate_calorie_input(values)
+    except CalorieInputError:
+        await start_step_by_step(message, state)
+        return
+    await send_calories(message, age, height, weight)
+    # '/Calories 30 180 75' may arrive in the middle of the step-by-step flow
+    await state.clear()
+
+
+async def calorie_input_filter(message: types.Message) -> Union[bool, Dict[str, Any]]:
+    """Matches messages with age, height and weight in one text and passes them as `calorie_input`."""
+    values = parse_calorie_input(message.text)
+    return {'calorie_input': values} if values else False
+
+
 @calorie_router.message(F.text == 'Calculate')
 async def main_menu(message: types.Message) -> None:
     await message.answer("Выберите опцию:", reply_markup=inline_menu_kbd())
@@ -29,41 +85,87 @@ async def show_formulas(callback_query: types.CallbackQuery) -> None:
     await callback_query.message.answer(MIFFLIN_FORMULA_MESSAGE)
 
 
+# Fast path: "30 180 75" outside any flow is answered without touching the FSM
+@calorie_router.message(StateFilter(None), calorie_input_filter)
+async def quick_calculation(message: types.Message, calorie_input: Dict[str, str], state: FSMContext) -> None:
+    await reply_with_calories(message, calorie_input, state)
+
+
 @calorie_router.callback_query(F.data == 'calories')
 @calorie_router.message(Command('Calories'))
-async def start_calorie_calculation(interaction: Union[types.CallbackQuery, types.Message], state: FSMContext) -> None:
-    await state.set_state(UserState.age)
-    await ask_question(interaction.message if isinstance(interaction, types.CallbackQuery) else interaction,
-                       AGE_PROMPT_MESSAGE)
+async def start_calorie_calculation(
+        interaction: Union[types.CallbackQuery, types.Message],
+        state: FSMContext,
+        command: Optional[CommandObject] = None
+) -> None:
+    # '/Calories 30 180 75' is answered right away
+    values = parse_calorie_input(command.args) if command is not None and command.args else None
+    if values:
+        await reply_with_calories(interaction, values, state)
+        return
+
+    await start_step_by_step(interaction.message if isinstance(interaction, types.CallbackQuery) else interaction,
+                             state)
+
+
+@calorie_router.callback_query(F.data == 'history')
+@calorie_router.message(Command('history'))
+async def show_history(interaction: Union[types.CallbackQuery, types.Message]) -> None:
+    summary = calorie_history.summary(interaction.from_user.id)
+    message = interaction.message if isinstance(interaction, types.CallbackQuery) else interaction
+    await message.answer(format_history(summary) if summary.count_30 else HISTORY_EMPTY_MESSAGE)
 
 
 @calorie_router.message(UserState.age)
 async def handle_age(message: types.Message, state: FSMContext) -> None:
-    await state.update_data(age=message.text)
+    values = parse_calorie_input(message.text)
+    if values:
+        try:
+            age, height, weight = validate_calorie_input(values)
+        except CalorieInputError as e:
+            await ask_again(message, e)
+            return
+        await send_calories(message, age, height, weight)
+        await state.clear()
+        return
+
+    try:
+        age = parse_value('age', message.text)
+    except CalorieInputError as e:
+        await ask_again(message, e)
+        return
+    await state.update_data(age=age)
     await state.set_state(UserState.height)
     await ask_question(message, HEIGHT_PROMPT_MESSAGE)
 
 
 @calorie_router.message(UserState.height)
 async def handle_height(message: types.Message, state: FSMContext) -> None:
-    await state.update_data(height=message.text)
+    try:
+        height = parse_value('height', message.text)
+    except CalorieInputError as e:
+        await ask_again(message, e)
+        return
+    await state.update_data(height=height)
     await state.set_state(UserState.weight)
     await ask_question(message, WEIGHT_PROMPT_MESSAGE)
 
 
 @calorie_router.message(UserState.weight)
 async def handle_weight(message: types.Message, state: FSMContext) -> None:
-    await state.update_data(weight=message.text)
+    try:
+        weight = parse_value('weight', message.text)
+    except CalorieInputError as e:
+        await ask_again(message, e)
+        return
     data = await state.get_data()
     try:
         age = int(data['age'])
         height = int(data['height'])
-        weight = int(data['weight'])
-    except ValueError:
+    except (KeyError, ValueError):
         await message.answer(CALCULATION_ERROR_MESSAGE)
         await state.clear()
         return
 
-    calories = calculate_calories(age, height, weight)
-    await message.answer(f"Ваша норма калорий: {calories} калорий в день.")
+    await send_calories(message, age, height, weight)
     await state.clear()
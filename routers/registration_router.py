@@ -2,12 +2,14 @@ from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from db.db_manager import DatabaseManager
-from service.users import is_user_exists, add_user
+from service.idempotency import idempotency_key
+from service.users import is_user_exists, add_user, ensure_users_schema
 from states.registration_state import RegistrationState
 
 # Initialize the router and database manager
 registration_router = Router()
 db_manager = DatabaseManager('users')
+ensure_users_schema(db_manager)
 
 
 # Registration start function
@@ -77,7 +79,10 @@ async def set_age(message: Message, state: FSMContext):
     add_user(db_manager,
              username=username,
              email=email,
-             age=age)
+             age=age,
+             chat_id=message.chat.id,
+             telegram_id=message.from_user.id,
+             idempotency_key=idempotency_key('registration', message.chat.id, message.message_id))
 
     # Clear the FSM and finish the registration process
     await state.clear()
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from db.db_manager import DatabaseManager
+from service.users import mark_users_unreachable
+from utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+BROADCASTS_TABLE = 'broadcasts'
+BROADCASTS_COLUMNS = ['id', 'text', 'status', 'last_user_id', 'sent', 'failed']
+RECIPIENT_CONDITION = {'chat_id is not': None, 'is_reachable': 1}
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+
+# Telegram allows about 30 messages per second to different chats
+DEFAULT_RATE = 25
+DEFAULT_CONCURRENCY = 10
+DEFAULT_BATCH_SIZE = 500
+MAX_SEND_ATTEMPTS = 3
+
+
+def create_broadcast(db_manager: DatabaseManager, text: str) -> int:
+    """Creates a pending broadcast and returns its id."""
+    return db_manager.insert(BROADCASTS_TABLE, {'text': text, 'status': STATUS_PENDING})
+
+
+def get_broadcast(db_manager: DatabaseManager, broadcast_id: int) -> Optional[Dict[str, Any]]:
+    """Returns the broadcast with the given id, or None if it does not exist."""
+    rows = db_manager.fetch_if(BROADCASTS_TABLE, {'id': broadcast_id}, BROADCASTS_COLUMNS)
+    return rows[0] if rows else None
+
+
+def get_unfinished_broadcasts(db_manager: DatabaseManager) -> List[Dict[str, Any]]:
+    """Returns broadcasts that were interrupted before completion."""
+    return db_manager.fetch_if(BROADCASTS_TABLE, {'status': STATUS_RUNNING}, BROADCASTS_COLUMNS)
+
+
+class Broadcaster:
+    """
+    Sends a broadcast to every reachable registered user.
+
+    Recipients are streamed from the 'users' table in batches ordered by id, sent with
+    bounded concurrency under a global rate limit, and progress is checkpointed after
+    every batch so an interrupted broadcast resumes from the last finished batch.
+
+    Attributes:
+        bot (Bot): The bot used to send messages.
+        users_db (DatabaseManager): The database manager of the 'users' table.
+        broadcasts_db (DatabaseManager): The database manager of the 'broadcasts' table.
+        limiter (TokenBucket): The send rate limiter; share one between all broadcasts, since
+            Telegram's limit applies to the bot as a whole.
+        concurrency (int): The maximum number of in-flight sends.
+        batch_size (int): The number of recipients read and checkpointed at once.
+    """
+
+    def __init__(
+            self,
+            bot: Bot,
+            users_db: DatabaseManager,
+            broadcasts_db: DatabaseManager,
+            limiter: TokenBucket,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> None:
+        self.bot = bot
+        self.users_db = users_db
+        self.broadcasts_db = broadcasts_db
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+
+    async def _send(self, chat_id: int, text: str) -> Optional[bool]:
+        """
+        Sends the text to a single chat, retrying when Telegram asks to slow down.
+
+        Returns:
+            Optional[bool]: True if sent, False if failed, None if the chat is unreachable.
+        """
+        for _ in range(MAX_SEND_ATTEMPTS):
+            await self.limiter.acquire()
+            try:
+                # Sent as typed: the bot's default HTML parse mode would reject a stray '<' or '&'
+                await self.bot.send_message(chat_id, text, parse_mode=None)
+                return True
+            except TelegramRetryAfter as e:
+                # Flood control applies to the whole bot, so every sender waits
+                self.limiter.pause(e.retry_after)
+            except TelegramForbiddenError:
+                return None
+            except TelegramBadRequest as e:
+                if 'chat not found' in e.message.lower():
+                    return None
+                logger.warning('Broadcast to chat %s rejected: %s', chat_id, e.message,
+                               extra={'sample_key': 'broadcast_failed'})
+                return False
+            except TelegramAPIError as e:
+                logger.warning('Broadcast to chat %s failed: %s', chat_id, e,
+                               extra={'sample_key': 'broadcast_failed'})
+                return False
+        return False
+
+    async def _send_batch(self, recipients: List[Dict[str, Any]], text: str) -> Dict[str, int]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(recipient: Dict[str, Any]) -> Optional[bool]:
+            async with semaphore:
+                return await self._send(recipient['chat_id'], text)
+
+        results = await asyncio.gather(*(send(recipient) for recipient in recipients))
+
+        unreachable = [recipient['id'] for recipient, result in zip(recipients, results) if result is None]
+        mark_users_unreachable(self.users_db, unreachable)
+        return {
+            'sent': sum(1 for result in results if result),
+            'failed': sum(1 for result in results if not result),
+        }
+
+    async def run(self, broadcast_id: int) -> Dict[str, Any]:
+        """
+        Sends the broadcast, starting after the last checkpointed recipient.
+
+        Args:
+            broadcast_id (int): The id of the broadcast to send or resume.
+
+        Returns:
+            Dict[str, Any]: The final state of the broadcast.
+        """
+        broadcast = get_broadcast(self.broadcasts_db, broadcast_id)
+        if broadcast is None:
+            raise ValueError(f'Broadcast {broadcast_id} does not exist.')
+        if broadcast['status'] == STATUS_DONE:
+            return broadcast
+
+        broadcast['status'] = STATUS_RUNNING
+        self._checkpoint(broadcast)
+        logger.info('Broadcast %s started after user %s.', broadcast_id, broadcast['last_user_id'])
+
+        for recipients in self.users_db.iter_batches(
+                'users',
+                ['chat_id'],
+                condition=RECIPIENT_CONDITION,
+                batch_size=self.batch_size,
+                after_id=broadcast['last_user_id']
+        ):
+            counts = await self._send_batch(recipients, broadcast['text'])
+            broadcast['last_user_id'] = recipients[-1]['id']
+            broadcast['sent'] += counts['sent']
+            broadcast['failed'] += counts['failed']
+            self._checkpoint(broadcast)
+
+        broadcast['status'] = STATUS_DONE
+        self._checkpoint(broadcast)
+        logger.info('Broadcast %s finished: %s sent, %s failed.', broadcast_id, broadcast['sent'], broadcast['failed'])
+        return broadcast
+
+    def _checkpoint(self, broadcast: Dict[str, Any]) -> None:
+        self.broadcasts_db.update(
+            BROADCASTS_TABLE,
+            {key: broadcast[key] for key in ('status', 'last_user_id', 'sent', 'failed')},
+            condition={'id': broadcast['id']}
+        )
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from db.db_manager import DatabaseManager, DatabaseError
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TABLE = 'history'
+HISTORY_COLUMNS = ['telegram_id', 'calories', 'age', 'height', 'weight', 'created_at']
+DAILY_TABLE = 'history_daily'
+
+SECONDS_PER_DAY = 24 * 60 * 60
+WINDOW_DAYS = 30
+SHORT_WINDOW_DAYS = 7
+
+DEFAULT_ACTIVE_USERS = 100_000
+DEFAULT_ACTIVE_TTL = 24 * 60 * 60
+DEFAULT_FLUSH_EVERY = 200
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+def current_day(timestamp: Optional[float] = None) -> int:
+    """Returns the number of the UTC day of the timestamp, the current one by default."""
+    return int((time.time() if timestamp is None else timestamp) // SECONDS_PER_DAY)
+
+
+@dataclass
+class HistorySummary:
+    """
+    Rolling calorie statistics of one user.
+
+    Attributes:
+        avg_7 (Optional[float]): The average result of the last 7 days, None without calculations.
+        count_7 (int): The number of calculations in the last 7 days.
+        avg_30 (Optional[float]): The average result of the last 30 days, None without calculations.
+        count_30 (int): The number of calculations in the last 30 days.
+    """
+    avg_7: Optional[float]
+    count_7: int
+    avg_30: Optional[float]
+    count_30: int
+
+    @property
+    def trend(self) -> Optional[float]:
+        """How much the 7-day average differs from the 30-day one."""
+        if self.avg_7 is None or self.avg_30 is None:
+            return None
+        return self.avg_7 - self.avg_30
+
+
+class CalorieWindow:
+    """
+    Daily calorie totals of one user for the last WINDOW_DAYS days.
+
+    Totals and counts live in two fixed-size arrays used as a ring indexed by the
+    day number, and the 7- and 30-day sums are updated as days are added and leave
+    the window, so a summary never iterates over the days.
+    """
+
+    __slots__ = ('day', 'totals', 'counts', 'sum_7', 'count_7', 'sum_30', 'count_30')
+
+    def __init__(self, day: int) -> None:
+        self._reset(day)
+
+    def _reset(self, day: int) -> None:
+        self.day = day
+        self.totals = array('d', [0.0]) * WINDOW_DAYS
+        self.counts = array('L', [0]) * WINDOW_DAYS
+        self.sum_7 = self.sum_30 = 0.0
+        self.count_7 = self.count_30 = 0
+
+    def advance(self, day: int) -> None:
+        """Moves the window forward so that it ends with the given day."""
+        if day <= self.day:
+            return
+        if day - self.day >= WINDOW_DAYS:
+            self._reset(day)
+            return
+        totals, counts = self.totals, self.counts
+        for new_day in range(self.day + 1, day + 1):
+            leaving_short = (new_day - SHORT_WINDOW_DAYS) % WINDOW_DAYS
+            self.sum_7 -= totals[leaving_short]
+            self.count_7 -= counts[leaving_short]
+            # The slot of the new day still holds the day that leaves the 30-day window
+            slot = new_day % WINDOW_DAYS
+            self.sum_30 -= totals[slot]
+            self.count_30 -= counts[slot]
+            totals[slot] = 0.0
+            counts[slot] = 0
+        self.day = day
+
+    def add(self, day: int, total: float, count: int = 1) -> None:
+        """
+        Adds calculations made on the given day.
+
+        Args:
+            day (int): The day number, see ``current_day``. Days before the window are ignored.
+            total (float): The sum of the calculated calories.
+            count (int): The number of calculations.
+        """
+        self.advance(day)
+        age = self.day - day
+        if age >= WINDOW_DAYS:
+            return
+        slot = day % WINDOW_DAYS
+        self.totals[slot] += total
+        self.counts[slot] += count
+        self.sum_30 += total
+        self.count_30 += count
+        if age < SHORT_WINDOW_DAYS:
+            self.sum_7 += total
+            self.count_7 += count
+
+    def summary(self) -> HistorySummary:
+        """Returns the averages of the window."""
+        return HistorySummary(
+            avg_7=self.sum_7 / self.count_7 if self.count_7 else None,
+            count_7=self.count_7,
+            avg_30=self.sum_30 / self.count_30 if self.count_30 else None,
+            count_30=self.count_30,
+        )
+
+
+class CalorieHistory:
+    """
+    Records calorie calculations and answers rolling summaries per user.
+
+    Every calculation is appended to the 'history' table and added to a per-day
+    total in 'history_daily'. Both writes are buffered and committed together, every
+    ``flush_every`` records or ``flush_interval`` seconds. Windows of active users are
+    kept in memory; a summary of any other user reads at most WINDOW_DAYS daily rows
+    by primary key, so its cost does not depend on the size of the history.
+
+    Attributes:
+        db_manager (DatabaseManager): The database manager of the 'history' tables.
+        flush_every (int): The number of buffered records that triggers a write.
+        flush_interval (float): The maximum number of seconds a record stays buffered.
+    """
+
+    def __init__(
+            self,
+            db_manager: DatabaseManager,
+            active_users: int = DEFAULT_ACTIVE_USERS,
+            active_ttl: float = DEFAULT_ACTIVE_TTL,
+            flush_every: int = DEFAULT_FLUSH_EVERY,
+            flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ) -> None:
+        self.db_manager = db_manager
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._windows: TTLCache[int, CalorieWindow] = TTLCache(active_users, active_ttl)
+        self._pending_rows: List[tuple] = []
+        # (telegram_id, day) -> [total, count] not yet added to 'history_daily'
+        self._pending_days: Dict[Tuple[int, int], List[float]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _load_window(self, telegram_id: int, day: int) -> CalorieWindow:
+        window = CalorieWindow(day)
+        rows = self.db_manager.fetch_if(
+            DAILY_TABLE,
+            {'telegram_id': telegram_id, 'day >': day - WINDOW_DAYS},
+            ['day', 'total', 'count']
+        )
+        for row in rows:
+            window.add(row['day'], row['total'], row['count'])
+        # Buffered records of a window that was evicted before they were written
+        for pending_day in range(day - WINDOW_DAYS + 1, day + 1):
+            pending = self._pending_days.get((telegram_id, pending_day))
+            if pending is not None:
+                window.add(pending_day, pending[0], int(pending[1]))
+        return window
+
+    def _window(self, telegram_id: int, day: int) -> CalorieWindow:
+        window = self._windows.get(telegram_id)
+        if window is None:
+            window = self._load_window(telegram_id, day)
+            self._windows.set(telegram_id, window)
+        else:
+            window.advance(day)
+        return window
+
+    def record(self, telegram_id: int, calories: float, age: int, height: int, weight: int) -> None:
+        """
+        Records a calculation of the user.
+
+        Args:
+            telegram_id (int): The Telegram user ID.
+            calories (float): The calculated calorie norm.
+            age (int): The age the calculation was made for.
+            height (int): The height the calculation was made for.
+            weight (int): The weight the calculation was made for.
+        """
+        now = time.time()
+        day = current_day(now)
+        self._window(telegram_id, day).add(day, calories)
+
+        self._pending_rows.append((telegram_id, calories, age, height, weight, int(now)))
+        pending = self._pending_days.setdefault((telegram_id, day), [0.0, 0])
+        pending[0] += calories
+        pending[1] += 1
+
+        if len(self._pending_rows) >= self.flush_every:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def summary(self, telegram_id: int) -> HistorySummary:
+        """
+        Returns the 7- and 30-day averages of the user.
+
+        Args:
+            telegram_id (int): The Telegram user ID.
+
+        Returns:
+            HistorySummary: The rolling statistics.
+        """
+        return self._window(telegram_id, current_day()).summary()
+
+    def flush(self) -> None:
+        """Writes the buffered records in a single transaction."""
+        if not self._pending_rows:
+            return
+        rows, self._pending_rows = self._pending_rows, []
+        days, self._pending_days = self._pending_days, {}
+        try:
+            with self.db_manager.transaction():
+                self.db_manager.insert_many(HISTORY_TABLE, HISTORY_COLUMNS, rows)
+                self.db_manager.accumulate_many(
+                    DAILY_TABLE,
+                    ['telegram_id', 'day'],
+                    ['total', 'count'],
+                    [(telegram_id, day, total, count) for (telegram_id, day), (total, count) in days.items()]
+                )
+        except DatabaseError as e:
+            logger.warning('Failed to write %s calorie history records: %s', len(rows), e)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            try:
+                self._flusher = asyncio.get_running_loop().create_task(self._flush_periodically())
+            except RuntimeError:
+                # No running loop: records are written every flush_every records and on close
+                self._flusher = None
+
+    async def close(self) -> None:
+        """Stops the periodic writes and writes the buffered records."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        self.flush()
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+from db.db_manager import DatabaseManager, DatabaseError
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TABLE = 'idempotency'
+DEFAULT_CAPACITY = 100_000
+# Telegram keeps undelivered updates for 24 hours
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_FLUSH_EVERY = 50
+# After a crash Telegram redelivers the newest updates, i.e. the buffered keys
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+def idempotency_key(*parts: Any) -> str:
+    """
+    Builds a key identifying one side effect, e.g. ``idempotency_key('purchase', callback_query.id)``.
+
+    Args:
+        *parts (Any): Values that together identify the operation.
+
+    Returns:
+        str: The key.
+    """
+    return ':'.join(str(part) for part in parts)
+
+
+class IdempotencyStore:
+    """
+    Remembers which operations were already performed.
+
+    Keys are kept in a bounded LRU in memory. When a database is attached, new keys
+    are also written to it in batches, every ``flush_every`` keys or ``flush_interval``
+    seconds, and the most recent keys are loaded back on startup, so redeliveries
+    after a restart are recognised as well.
+
+    Attributes:
+        capacity (int): The maximum number of remembered keys.
+        flush_every (int): The number of new keys buffered before writing them to the database.
+        flush_interval (float): The maximum number of seconds a new key stays buffered.
+    """
+
+    def __init__(
+            self,
+            capacity: int = DEFAULT_CAPACITY,
+            ttl: float = DEFAULT_TTL,
+            flush_every: int = DEFAULT_FLUSH_EVERY,
+            flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ) -> None:
+        self.capacity = capacity
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._keys: TTLCache[str, bool] = TTLCache(capacity, ttl)
+        self._pending: List[str] = []
+        self._db_manager: Optional[DatabaseManager] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def attach(self, db_manager: DatabaseManager) -> None:
+        """
+        Persists keys to the 'idempotency' table and loads the most recent ones.
+
+        Args:
+            db_manager (DatabaseManager): The database manager of the 'idempotency' table.
+        """
+        self._db_manager = db_manager
+        # Keep only as many keys as fit in memory
+        max_id = db_manager.get_column_max(IDEMPOTENCY_TABLE, 'id')
+        if max_id is not None:
+            db_manager.delete_if(IDEMPOTENCY_TABLE, {'id <=': max_id - self.capacity})
+        for batch in db_manager.iter_batches(IDEMPOTENCY_TABLE, ['key']):
+            for row in batch:
+                self._keys.set(row['key'], True)
+        logger.info('Loaded %s idempotency keys.', len(self._keys))
+
+    def claim(self, key: str) -> bool:
+        """
+        Records the key unless it was recorded before.
+
+        Args:
+            key (str): The operation key, see ``idempotency_key``.
+
+        Returns:
+            bool: True if the caller should perform the operation, False for a repeat.
+        """
+        if key in self._keys:
+            return False
+        self._keys.set(key, True)
+        if self._db_manager is not None:
+            self._pending.append(key)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+            else:
+                self._ensure_flusher()
+        return True
+
+    def release(self, key: str) -> None:
+        """
+        Forgets a claimed key, e.g. when the operation failed and may be retried.
+
+        Args:
+            key (str): The operation key.
+        """
+        self._keys.pop(key)
+        if key in self._pending:
+            self._pending.remove(key)
+        elif self._db_manager is not None:
+            self._db_manager.delete_if(IDEMPOTENCY_TABLE, {'key': key})
+
+    def flush(self) -> None:
+        """Writes the buffered keys to the database, if one is attached."""
+        if self._db_manager is None or not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            self._db_manager.insert_many(IDEMPOTENCY_TABLE, ['key'], [(key,) for key in pending], ignore_existing=True)
+        except DatabaseError as e:
+            logger.warning('Failed to persist %s idempotency keys: %s', len(pending), e)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            try:
+                self._flusher = asyncio.get_running_loop().create_task(self._flush_periodically())
+            except RuntimeError:
+                # No running loop: keys are written every flush_every keys and on close
+                self._flusher = None
+
+    async def close(self) -> None:
+        """Stops the periodic writes and writes the buffered keys."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        self.flush()
+
+
+# Shared by the update de-duplication middleware and side-effecting services
+idempotency_store = IdempotencyStore()
@@ -1,9 +1,78 @@
 from db.db_manager import DatabaseManager, DatabaseError
+from models.user import User
+from service.idempotency import idempotency_store
+from utils.ttl_cache import TTLCache
 
 import logging
 
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
 DEFAULT_BALANCE = 1000
 
+# Columns introduced after the initial schema, added to existing databases on startup
+USERS_EXTRA_COLUMNS = {
+    'chat_id': 'INTEGER',
+    'is_reachable': 'INTEGER NOT NULL DEFAULT 1',
+    'telegram_id': 'INTEGER',
+}
+
+USER_CACHE_SIZE = 50_000
+USER_CACHE_TTL = 300.0
+# Unregistered users are cached shorter, as they may register from another process
+UNKNOWN_USER_CACHE_TTL = 30.0
+
+# Registered users by Telegram id; None marks a Telegram user without a profile
+user_cache: TTLCache[int, Optional[User]] = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+def ensure_users_schema(db_manager: DatabaseManager) -> None:
+    """
+    :param db_manager: The database manager instance used to interact with the database.
+    :return: None. Adds the columns missing from an existing 'users' table.
+    """
+    db_manager.add_missing_columns('users', USERS_EXTRA_COLUMNS)
+    db_manager.create_index('users', 'telegram_id')
+
+
+def row_to_user(row: Dict[str, Any]) -> User:
+    """
+    :param row: A row of the 'users' table as returned by the database manager.
+    :return: The User model built from the row.
+    """
+    return User(
+        username=row['username'],
+        email=row['email'],
+        age=row['age'],
+        balance=row['balance'],
+        id=row['id'],
+        chat_id=row.get('chat_id'),
+        is_reachable=bool(row.get('is_reachable', 1)),
+        telegram_id=row.get('telegram_id'),
+    )
+
+
+def get_user_by_telegram_id(db_manager: DatabaseManager, telegram_id: int) -> Optional[User]:
+    """
+    :param db_manager: The database manager instance used to interact with the database.
+    :param telegram_id: The Telegram id of the user.
+    :return: The registered user, or None if the Telegram user has not registered.
+        Served from user_cache; the database is queried only on a cache miss. If the
+        Telegram user registered several times, the latest registration is returned.
+    """
+    user = user_cache.get(telegram_id, _MISSING)
+    if user is not _MISSING:
+        return user
+
+    # The newest row, the same one add_user puts in the cache
+    row = db_manager.fetch_last('users', {'telegram_id': telegram_id})
+    user = row_to_user(row) if row else None
+    user_cache.set(telegram_id, user, ttl=None if user else UNKNOWN_USER_CACHE_TTL)
+    return user
+
 
 def is_user_exists(db_manager: DatabaseManager, username: str) -> bool:
     """
@@ -11,7 +80,7 @@ def is_user_exists(db_manager: DatabaseManager, username: str) -> bool:
     :param username: The username of the user to check for existence in the database.
     :return: A boolean value indicating whether the user exists (True) or not (False).
     """
-    users = db_manager.fetch_if('users', f'username="{username}"')
+    users = db_manager.fetch_if('users', {'username': username}, ['id'])
     return len(users) > 0
 
 
@@ -21,27 +90,73 @@ def log_user_addition(username: str, email: str) -> None:
     :param email: The email address of the new user being added.
     :return: None
     """
-    logging.info(f'New User {username} with email: {email} added.')
+    logger.info('New User %s with email: %s added.', username, email, extra={'sample_key': 'user_added'})
 
 
-def add_user(database, username: str, email: str, age: int) -> bool:
+def add_user(
+        database,
+        username: str,
+        email: str,
+        age: int,
+        chat_id: Optional[int] = None,
+        telegram_id: Optional[int] = None,
+        idempotency_key: Optional[str] = None
+) -> bool:
     """
     :param database: The database instance used to interact with the 'users' table.
     :param username: The username of the new user to be added.
     :param email: The email address of the new user to be added.
     :param age: The age of the new user to be added.
-    :return: True if the user was successfully added to the database, otherwise False.
+    :param chat_id: The Telegram chat id used to message the user, e.g. for broadcasts.
+    :param telegram_id: The Telegram id of the user, used to resolve the current user.
+    :param idempotency_key: Identifies the registration request; a repeated request adds no row.
+    :return: True if the user was successfully added to the database (or already was for this key),
+        otherwise False.
     """
+    if idempotency_key is not None and not idempotency_store.claim(idempotency_key):
+        return True
     try:
         column_values = {
             'username': username,
             'email': email,
             'age': age,
-            'balance': DEFAULT_BALANCE
+            'balance': DEFAULT_BALANCE,
+            'chat_id': chat_id,
+            'telegram_id': telegram_id,
         }
-        database.insert('users', column_values)
+        user_id = database.insert('users', column_values)
+        if telegram_id is not None:
+            # Replaces a cached "not registered" entry
+            user_cache.set(telegram_id, row_to_user({**column_values, 'id': user_id}))
         log_user_addition(username, email)
         return True
     except DatabaseError as e:
-        logging.exception(f"Error adding user: {e}")
+        logger.exception('Error adding user: %s', e)
+        if idempotency_key is not None:
+            idempotency_store.release(idempotency_key)
         return False
+
+
+def update_balance(db_manager: DatabaseManager, user: User, balance: int) -> None:
+    """
+    :param db_manager: The database manager instance used to interact with the database.
+    :param user: The registered user whose balance changes.
+    :param balance: The new balance.
+    :return: None. Updates the database and the cached profile.
+    """
+    db_manager.update('users', {'balance': balance}, condition={'id': user.id})
+    user.balance = balance
+    if user.telegram_id is not None:
+        user_cache.set(user.telegram_id, user)
+
+
+def mark_users_unreachable(db_manager: DatabaseManager, user_ids: List[int]) -> None:
+    """
+    :param db_manager: The database manager instance used to interact with the database.
+    :param user_ids: Ids of the users who blocked the bot or whose chat no longer exists.
+    :return: None. Excludes the users from further broadcasts.
+        Cached profiles keep the old flag until they expire; broadcasts read it from the database.
+    """
+    if not user_ids:
+        return
+    db_manager.update('users', {'is_reachable': 0}, condition={'id in': user_ids})
@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict, Hashable
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+class _ChatQueue:
+    """The lock of one chat and the number of updates that hold or wait for it."""
+
+    __slots__ = ('lock', 'waiting')
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+
+
+class ChatEventIsolation(BaseEventIsolation):
+    """
+    Handles the updates of one chat one at a time, in arrival order, and different chats in parallel.
+
+    Polling starts a task per update, so without isolation two quick messages of one
+    chat run concurrently and both see the same FSM state, e.g. both pass the username
+    check of the registration flow before either user is added. The dispatcher takes
+    this lock before it reads the FSM state, so every update sees the state left by
+    the previous one.
+
+    Each chat has a FIFO lock that is dropped as soon as no update holds or waits for
+    it, unlike aiogram's ``SimpleEventIsolation`` which keeps a lock per key forever.
+    A global semaphore, taken after the chat lock, bounds the number of updates handled
+    at once, so updates queued behind a slow handler never occupy a slot.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> None:
+        """
+        Args:
+            max_concurrency (int): The maximum number of updates handled at once.
+        """
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._queues: Dict[Hashable, _ChatQueue] = {}
+
+    @property
+    def active_chats(self) -> int:
+        """The number of chats with an update being handled or waiting."""
+        # Not __len__: an idle isolation must stay truthy for Dispatcher(events_isolation=...)
+        return len(self._queues)
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        # The FSM key may include the user and thread; updates are ordered per chat
+        chat_key = key.bot_id, key.chat_id
+        queue = self._queues.get(chat_key)
+        if queue is None:
+            queue = self._queues[chat_key] = _ChatQueue()
+        queue.waiting += 1
+        try:
+            async with queue.lock:
+                async with self._slots:
+                    yield
+        finally:
+            queue.waiting -= 1
+            if not queue.waiting:
+                del self._queues[chat_key]
+
+    async def close(self) -> None:
+        self._queues.clear()
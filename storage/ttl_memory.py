@@ -0,0 +1,158 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import DEFAULT_DESTINY, BaseStorage, StateType, StorageKey
+
+DEFAULT_TTL = 6 * 60 * 60
+DEFAULT_MAX_RECORDS = 200_000
+DEFAULT_SWEEP_INTERVAL = 60.0
+
+
+class _Record:
+    """The FSM state and data of one conversation; empty data is stored as None."""
+
+    __slots__ = ('state', 'data', 'expires_at')
+
+    def __init__(self, expires_at: float) -> None:
+        self.state: Optional[str] = None
+        self.data: Optional[Dict[str, Any]] = None
+        self.expires_at = expires_at
+
+
+class TTLMemoryStorage(BaseStorage):
+    """
+    In-memory FSM storage with expiry and a size cap.
+
+    Unlike aiogram's ``MemoryStorage``, reading a conversation that has no state does
+    not create a record, a conversation whose state and data are cleared is removed,
+    conversations untouched for ``ttl`` seconds expire, and at most ``max_records``
+    conversations are kept, evicting the least recently used one.
+
+    Every access moves the record to the end of an ordered dict and extends its expiry
+    by the same TTL, so records are ordered by expiry time. The background sweep pops
+    expired records from the front and stops at the first live one, never scanning the
+    whole storage. Like ``MemoryStorage``, nothing survives a restart.
+    """
+
+    def __init__(
+            self,
+            ttl: float = DEFAULT_TTL,
+            max_records: int = DEFAULT_MAX_RECORDS,
+            sweep_interval: float = DEFAULT_SWEEP_INTERVAL
+    ) -> None:
+        """
+        Args:
+            ttl (float): Seconds after the last access a conversation is forgotten.
+            max_records (int): The maximum number of stored conversations.
+            sweep_interval (float): Seconds between background sweeps of expired records.
+        """
+        self.ttl = ttl
+        self.max_records = max_records
+        self.sweep_interval = sweep_interval
+        self._records: 'OrderedDict[Hashable, _Record]' = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @property
+    def size(self) -> int:
+        """The number of stored conversations."""
+        # Not __len__: an empty storage must stay truthy for Dispatcher(storage=...)
+        return len(self._records)
+
+    @staticmethod
+    def _compact_key(key: StorageKey) -> Hashable:
+        # Most keys only differ by chat and user; the full tuple is kept for the rest
+        if key.thread_id is None and key.business_connection_id is None and key.destiny == DEFAULT_DESTINY:
+            return key.bot_id, key.chat_id, key.user_id
+        return key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny
+
+    def _get(self, key: StorageKey) -> Optional[_Record]:
+        compact_key = self._compact_key(key)
+        record = self._records.get(compact_key)
+        if record is None:
+            return None
+        now = time.monotonic()
+        if record.expires_at <= now:
+            del self._records[compact_key]
+            return None
+        record.expires_at = now + self.ttl
+        self._records.move_to_end(compact_key)
+        return record
+
+    def _get_or_create(self, key: StorageKey) -> _Record:
+        record = self._get(key)
+        if record is None:
+            record = self._records[self._compact_key(key)] = _Record(time.monotonic() + self.ttl)
+            if len(self._records) > self.max_records:
+                self._records.popitem(last=False)
+            self._ensure_sweeper()
+        return record
+
+    def _discard_if_empty(self, key: StorageKey, record: _Record) -> None:
+        if record.state is None and not record.data:
+            self._records.pop(self._compact_key(key), None)
+
+    def sweep(self) -> int:
+        """
+        Removes expired records from the front of the storage.
+
+        Returns:
+            int: The number of removed records.
+        """
+        now = time.monotonic()
+        removed = 0
+        while self._records:
+            compact_key, record = next(iter(self._records.items()))
+            if record.expires_at > now:
+                break
+            del self._records[compact_key]
+            removed += 1
+        return removed
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is None or self._sweeper.done():
+            try:
+                self._sweeper = asyncio.get_running_loop().create_task(self._sweep_periodically())
+            except RuntimeError:
+                # No running loop: expired records are still dropped on access
+                self._sweeper = None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        if state is None:
+            record = self._get(key)
+            if record is not None:
+                record.state = None
+                self._discard_if_empty(key, record)
+            return
+        self._get_or_create(key).state = state
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = self._get(key)
+        return record.state if record is not None else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        if not data:
+            record = self._get(key)
+            if record is not None:
+                record.data = None
+                self._discard_if_empty(key, record)
+            return
+        self._get_or_create(key).data = data.copy()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = self._get(key)
+        return record.data.copy() if record is not None and record.data else {}
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        self._records.clear()
@@ -1,2 +1,126 @@
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+# Plausible input ranges; values outside them are rejected before the calculation
+VALUE_RANGES: Dict[str, Tuple[int, int]] = {
+    'age': (10, 120),
+    'height': (100, 250),
+    'weight': (25, 300),
+}
+
+_BARE_INPUT = re.compile(r'^\s*(\d{1,3})[\s,;/]+(\d{1,3})[\s,;/]+(\d{1,3})\s*$')
+_LABEL_VALUE = re.compile(r'([^\W\d_]+)\s*[:=]?\s*(\d{1,3})')
+_VALUE_UNIT = re.compile(r'(\d{1,3})\s*([^\W\d_]+)')
+
+LABELS: Dict[str, str] = {
+    'age': 'age',
+    'возраст': 'age',
+    'height': 'height',
+    'рост': 'height',
+    'weight': 'weight',
+    'вес': 'weight',
+}
+UNITS: Dict[str, str] = {
+    'y': 'age',
+    'yo': 'age',
+    'years': 'age',
+    'год': 'age',
+    'года': 'age',
+    'лет': 'age',
+    'cm': 'height',
+    'см': 'height',
+    'kg': 'weight',
+    'кг': 'weight',
+}
+
+
+class CalorieInputError(ValueError):
+    """Raised when a calorie calculation input is not a plausible number."""
+
+    def __init__(self, field: str, value: str) -> None:
+        self.field = field
+        self.value = value
+        low, high = VALUE_RANGES[field]
+        super().__init__(f'{field} must be a whole number from {low} to {high}, got {value!r}')
+
+
 def calculate_calories(age: int, height: int, weight: int) -> float:
     return 10 * weight + 6.25 * height - 5 * age + 5
+
+
+def parse_value(field: str, text: str) -> int:
+    """
+    Parses a single step of the calorie flow.
+
+    Args:
+        field (str): One of 'age', 'height' or 'weight'.
+        text (str): The user's message text.
+
+    Returns:
+        int: The validated value.
+
+    Raises:
+        CalorieInputError: If the text is not a number within the field's range.
+    """
+    text = (text or '').strip()
+    low, high = VALUE_RANGES[field]
+    if not text.isdecimal() or not low <= int(text) <= high:
+        raise CalorieInputError(field, text)
+    return int(text)
+
+
+def _match_fields(pairs: Iterable[Tuple[str, str]], names: Dict[str, str]) -> Optional[Dict[str, str]]:
+    fields: Dict[str, str] = {}
+    for name, value in pairs:
+        field = names.get(name)
+        if field is not None:
+            fields.setdefault(field, value)
+    return fields if len(fields) == len(VALUE_RANGES) else None
+
+
+def parse_calorie_input(text: str) -> Optional[Dict[str, str]]:
+    """
+    Extracts age, height and weight given in a single message.
+
+    Accepts bare values in that order ("30 180 75"), labelled values in any order
+    ("возраст 30 рост 180 вес 75", "age: 30, height: 180, weight: 75") and values
+    with units ("30 лет 180 см 75 кг").
+
+    Args:
+        text (str): The user's message text.
+
+    Returns:
+        Optional[Dict[str, str]]: The raw values by field, or None if the text does not
+        contain all three values. Use ``validate_calorie_input`` to check them.
+    """
+    if not text:
+        return None
+    bare = _BARE_INPUT.match(text)
+    if bare:
+        return dict(zip(('age', 'height', 'weight'), bare.groups()))
+
+    text = text.lower()
+    labelled = _match_fields(_LABEL_VALUE.findall(text), LABELS)
+    if labelled is not None:
+        return labelled
+    return _match_fields(((unit, value) for value, unit in _VALUE_UNIT.findall(text)), UNITS)
+
+
+def validate_calorie_input(values: Dict[str, str]) -> Tuple[int, int, int]:
+    """
+    Validates the values returned by ``parse_calorie_input``.
+
+    Args:
+        values (Dict[str, str]): The raw values by field.
+
+    Returns:
+        Tuple[int, int, int]: Age, height and weight.
+
+    Raises:
+        CalorieInputError: If any value is outside its plausible range.
+    """
+    return (
+        parse_value('age', values['age']),
+        parse_value('height', values['height']),
+        parse_value('weight', values['weight']),
+    )
@@ -0,0 +1,155 @@
+import contextvars
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO, Union
+
+from utils.rate_limiter import TokenBucket
+
+try:
+    import orjson
+
+
+    def _dumps(payload: Dict[str, Any]) -> str:
+        return orjson.dumps(payload, default=str).decode()
+except ImportError:  # pragma: no cover - orjson is optional
+    import json
+
+
+    def _dumps(payload: Dict[str, Any]) -> str:
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+# Identifiers of the update being handled, set by middlewares.logging_context
+update_id_var: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('update_id', default=None)
+user_id_var: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('user_id', default=None)
+
+QUEUE_SIZE = 10_000
+DEFAULT_SAMPLE_RATE = 10.0
+
+
+class ContextFilter(logging.Filter):
+    """Attaches the current update and user ids to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.update_id = update_id_var.get()
+        record.user_id = user_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limits high-volume records.
+
+    Records logged with ``extra={'sample_key': ...}`` pass at most ``rate`` times per
+    second per key; the rest are dropped and their number is reported on the next
+    record of the same key as ``suppressed``. Records without a key always pass.
+    """
+
+    def __init__(self, rate: float = DEFAULT_SAMPLE_RATE) -> None:
+        super().__init__()
+        self.rate = rate
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, 'sample_key', None)
+        if key is None:
+            return True
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate)
+        if not bucket.try_consume():
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+        record.suppressed = self._suppressed.pop(key, 0)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for field in ('update_id', 'user_id', 'sample_key', 'suppressed'):
+            value = getattr(record, field, None)
+            if value:
+                payload[field] = value
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc'] = record.exc_text
+        return _dumps(payload)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Enqueues records for the background writer without formatting them.
+
+    Only the message and traceback are rendered on the calling thread, as the
+    arguments and exception may not be safe to pass to another thread. A full
+    queue drops the record instead of blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(
+        level: Union[int, str] = logging.INFO,
+        stream: TextIO = sys.stdout,
+        sample_rate: float = DEFAULT_SAMPLE_RATE
+) -> QueueListener:
+    """
+    Configures the root logger to write JSON records from a background thread.
+
+    Args:
+        level (Union[int, str]): The root logging level.
+        stream (TextIO): The stream the writer thread writes to.
+        sample_rate (float): Records per second allowed for each sample key.
+
+    Returns:
+        QueueListener: The started writer; call ``stop()`` on shutdown to flush it.
+    """
+    log_queue: queue.Queue = queue.Queue(QUEUE_SIZE)
+
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    # Skip collecting process and thread details for every record
+    logging.logProcesses = False
+    logging.logThreads = False
+    logging.logMultiprocessing = False
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,281 @@
+import asyncio
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.005
+MAX_DURATION = 60.0
+PROFILE_DIR = 'profiles'
+
+# Samples whose innermost frame is the selector are the loop waiting for I/O
+IDLE_PREFIX = 'selectors:'
+
+MODE_SIGNAL = 'signal'
+MODE_THREAD = 'thread'
+
+# Code paths reported separately, matched by '<module>:<qualname>' prefix
+WATCHED_PREFIXES: Dict[str, str] = {
+    'DatabaseManager': 'db.db_manager:DatabaseManager.',
+    'send_product_message': 'routers.buying_router:send_product_message',
+}
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _collapse(frame: Optional[FrameType]) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def _is_idle(stack: str) -> bool:
+    return stack.rpartition(';')[2].startswith(IDLE_PREFIX)
+
+
+@dataclass
+class ProfileReport:
+    """
+    The result of a profiling run.
+
+    Attributes:
+        duration (float): The profiled wall time in seconds.
+        samples (int): The number of stack samples taken.
+        stacks (Counter): Sample counts by collapsed stack ('outer;...;inner').
+        loop_lags (List[float]): Event loop lag measurements in seconds.
+        mode (str): MODE_SIGNAL for timer signal samples, MODE_THREAD for the thread fallback.
+        path (Optional[str]): The collapsed-stack file, if written.
+    """
+    duration: float
+    samples: int
+    stacks: Counter
+    loop_lags: List[float] = field(default_factory=list)
+    mode: str = MODE_SIGNAL
+    path: Optional[str] = None
+
+    @property
+    def idle_samples(self) -> int:
+        """The number of samples taken while the loop waited in the selector."""
+        return sum(count for stack, count in self.stacks.items() if _is_idle(stack))
+
+    def top_functions(self, top_n: int = 15) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+        """
+        Returns the hottest functions by self and by inclusive samples, ignoring idle samples.
+
+        Args:
+            top_n (int): The number of functions to return for each ranking.
+
+        Returns:
+            Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]: Self and inclusive rankings.
+        """
+        self_counts: Counter = Counter()
+        inclusive_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            if _is_idle(stack):
+                continue
+            labels = stack.split(';')
+            self_counts[labels[-1]] += count
+            for label in set(labels):
+                inclusive_counts[label] += count
+        return self_counts.most_common(top_n), inclusive_counts.most_common(top_n)
+
+    def watched(self) -> Dict[str, int]:
+        """Returns inclusive sample counts of the code paths in WATCHED_PREFIXES."""
+        counts = dict.fromkeys(WATCHED_PREFIXES, 0)
+        for stack, count in self.stacks.items():
+            for name, prefix in WATCHED_PREFIXES.items():
+                if prefix in stack:
+                    counts[name] += count
+        return counts
+
+    def format_summary(self, top_n: int = 15) -> str:
+        """
+        Renders a plain text summary of the report.
+
+        Args:
+            top_n (int): The number of functions listed in each ranking.
+
+        Returns:
+            str: The summary.
+        """
+        idle = self.idle_samples
+        busy = max(self.samples - idle, 1)
+        self_top, inclusive_top = self.top_functions(top_n)
+        lines = [f'Profiled {self.duration:.1f}s, {self.samples} samples ({self.mode} sampler).']
+        if self.mode == MODE_THREAD:
+            lines.append('  The thread sampler only runs when the loop releases the GIL, so it under-counts '
+                         'short CPU bursts; percentages are unreliable.')
+        lines.append(f'Idle (waiting in the selector): {idle / max(self.samples, 1):.1%}')
+
+        if self.loop_lags:
+            lags = sorted(self.loop_lags)
+            p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+            lines.append(
+                f'Event loop lag: mean {sum(lags) / len(lags) * 1000:.1f}ms, '
+                f'p99 {p99 * 1000:.1f}ms, max {lags[-1] * 1000:.1f}ms'
+            )
+
+        lines.append('Watched (share of busy time):')
+        lines.extend(f'  {name}: {count / busy:.1%}' for name, count in self.watched().items())
+        lines.append('Top self time (share of busy time):')
+        lines.extend(f'  {count / busy:6.1%}  {label}' for label, count in self_top)
+        lines.append('Top inclusive time (share of busy time):')
+        lines.extend(f'  {count / busy:6.1%}  {label}' for label, count in inclusive_top)
+        if self.path:
+            lines.append(f'Collapsed stacks: {self.path}')
+        return '\n'.join(lines)
+
+    def write_collapsed(self, directory: str = PROFILE_DIR) -> str:
+        """
+        Writes the stacks in the collapsed format read by flamegraph.pl and speedscope.
+
+        Args:
+            directory (str): The output directory, created if missing.
+
+        Returns:
+            str: The path of the written file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'profile-{datetime.now():%Y%m%d-%H%M%S}.collapsed')
+        with open(path, 'w') as fd:
+            for stack, count in self.stacks.most_common():
+                fd.write(f'{stack} {count}\n')
+        self.path = path
+        return path
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop's stack at a fixed interval.
+
+    When the loop runs on the main thread, a SIGALRM timer with a jittered interval
+    takes the samples: the handler runs between bytecodes and receives the
+    interrupted frame, so short CPU bursts between awaits are caught as well as I/O
+    waits. Elsewhere a
+    background thread reads the loop thread's frame instead; it can only run when
+    the loop releases the GIL, mostly in the selector, so that fallback is biased
+    toward idle time and labelled as such in the report.
+
+    Meanwhile a coroutine on the loop measures how late its wake-ups are. Only one
+    profile runs at a time.
+
+    Attributes:
+        interval (float): The sampling and lag measurement interval in seconds.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+
+    def _sample(self, thread_id: int, stacks: Counter, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                stacks[_collapse(frame)] += 1
+            # Do not keep the loop thread's frames alive between samples
+            del frame
+
+    @staticmethod
+    def _can_use_signals() -> bool:
+        return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+    def _next_delay(self) -> float:
+        # A fixed period locks onto periodic work such as asyncio.sleep loops and skews the shares
+        return self.interval * random.uniform(0.5, 1.5)
+
+    async def _run_with_timer(self, seconds: float, stacks: Counter, lags: List[float]) -> None:
+        stopped = False
+
+        def on_timer(signum: int, frame: Optional[FrameType]) -> None:
+            stacks[_collapse(frame)] += 1
+            if not stopped:
+                signal.setitimer(signal.ITIMER_REAL, self._next_delay())
+
+        previous = signal.signal(signal.SIGALRM, on_timer)
+        signal.setitimer(signal.ITIMER_REAL, self._next_delay())
+        try:
+            await self._measure_lag(lags, asyncio.get_running_loop().time() + seconds)
+        finally:
+            stopped = True
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous if previous is not None else signal.SIG_DFL)
+
+    async def _run_with_thread(self, seconds: float, stacks: Counter, lags: List[float]) -> None:
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(), stacks, stop),
+            name='sampling-profiler',
+            daemon=True
+        )
+        sampler.start()
+        try:
+            await self._measure_lag(lags, asyncio.get_running_loop().time() + seconds)
+        finally:
+            stop.set()
+            # The sampler wakes up at least every interval, so this join is short
+            sampler.join()
+
+    async def _measure_lag(self, lags: List[float], deadline: float) -> None:
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lags.append(max(0.0, loop.time() - started - self.interval))
+
+    async def run(self, seconds: float, directory: Optional[str] = PROFILE_DIR) -> ProfileReport:
+        """
+        Profiles the running event loop.
+
+        Args:
+            seconds (float): The profiling duration, capped at MAX_DURATION.
+            directory (str, optional): Where to write the collapsed stacks; None skips the file.
+
+        Returns:
+            ProfileReport: The collected samples and loop lag.
+
+        Raises:
+            ProfilerBusyError: If another profile is running.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError('A profile is already running.')
+        try:
+            seconds = min(max(seconds, self.interval), MAX_DURATION)
+            stacks: Counter = Counter()
+            lags: List[float] = []
+            mode = MODE_SIGNAL if self._can_use_signals() else MODE_THREAD
+            started = time.monotonic()
+            if mode == MODE_SIGNAL:
+                await self._run_with_timer(seconds, stacks, lags)
+            else:
+                await self._run_with_thread(seconds, stacks, lags)
+            report = ProfileReport(
+                duration=time.monotonic() - started,
+                samples=sum(stacks.values()),
+                stacks=stacks,
+                loop_lags=lags,
+                mode=mode
+            )
+        finally:
+            self._lock.release()
+
+        if directory is not None:
+            report.write_collapsed(directory)
+        return report
@@ -0,0 +1,46 @@
+from aiohttp import web
+
+from utils.profiler import ProfilerBusyError, SamplingProfiler
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_SECONDS = 10.0
+
+
+async def handle_profile(request: web.Request) -> web.Response:
+    """
+    Handles 'GET /profile?seconds=N' by profiling the bot and returning the text summary.
+
+    Args:
+        request (web.Request): The incoming HTTP request.
+
+    Returns:
+        web.Response: The summary, 400 for a bad duration or 409 if a profile is running.
+    """
+    try:
+        seconds = float(request.query.get('seconds', DEFAULT_SECONDS))
+    except ValueError:
+        return web.Response(status=400, text='seconds must be a number\n')
+    try:
+        report = await SamplingProfiler().run(seconds)
+    except ProfilerBusyError as e:
+        return web.Response(status=409, text=f'{e}\n')
+    return web.Response(text=report.format_summary() + '\n')
+
+
+async def start_profiler_server(port: int, host: str = DEFAULT_HOST) -> web.AppRunner:
+    """
+    Serves the profiler on the bot's event loop. Binds to localhost unless told otherwise.
+
+    Args:
+        port (int): The TCP port.
+        host (str): The interface to bind to.
+
+    Returns:
+        web.AppRunner: The runner; call ``cleanup()`` on shutdown.
+    """
+    app = web.Application()
+    app.router.add_get('/profile', handle_profile)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
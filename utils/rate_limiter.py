@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    A token bucket rate limiter.
+
+    Tokens are refilled continuously at ``rate`` tokens per second up to ``capacity``.
+    Each operation consumes ``cost`` tokens; an operation is allowed only if enough
+    tokens are available.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        capacity (float): The maximum number of tokens the bucket can hold.
+        tokens (float): The number of tokens currently available.
+        updated_at (float): The monotonic time of the last refill.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        """
+        Initializes a full bucket.
+
+        Args:
+            rate (float): The number of tokens added per second.
+            capacity (float, optional): The bucket size. Defaults to ``rate`` (one second of burst).
+        """
+        self.rate: float = rate
+        self.capacity: float = rate if capacity is None else capacity
+        self.tokens: float = self.capacity
+        self.updated_at: float = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def try_consume(self, cost: float = 1.0, now: Optional[float] = None) -> bool:
+        """
+        Consumes tokens if enough are available.
+
+        Args:
+            cost (float): The number of tokens to consume.
+            now (float, optional): The current monotonic time. Defaults to ``time.monotonic()``.
+
+        Returns:
+            bool: True if the tokens were consumed, otherwise False.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def delay_for(self, cost: float = 1.0) -> float:
+        """
+        Returns the number of seconds until ``cost`` tokens become available.
+
+        Args:
+            cost (float): The number of tokens required.
+
+        Returns:
+            float: The delay in seconds, 0 if the tokens are available now.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        # updated_at may lie in the future after pause()
+        pending = max(0.0, self.updated_at - now)
+        return pending + max(0.0, cost - self.tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """
+        Empties the bucket and stops refilling for the given number of seconds.
+
+        Args:
+            seconds (float): The pause duration, e.g. a server-provided ``retry_after``.
+        """
+        self.tokens = 0.0
+        self.updated_at = max(self.updated_at, time.monotonic() + seconds)
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        """
+        Waits until ``cost`` tokens are available and consumes them.
+
+        Args:
+            cost (float): The number of tokens to consume.
+        """
+        while not self.try_consume(cost):
+            await asyncio.sleep(self.delay_for(cost))
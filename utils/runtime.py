@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from os import getenv
+from typing import Any, Callable, Coroutine, Optional, Tuple
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop is optional
+    uvloop = None
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = getenv(name)
+    return default if value is None else value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+@dataclass
+class RuntimeProfile:
+    """
+    Network and event loop settings of the bot.
+
+    Attributes:
+        connection_limit (int): The maximum number of simultaneous connections to the Bot API.
+        keepalive_timeout (float): Seconds an idle connection is kept open for reuse.
+        request_timeout (float): The timeout of a single API request in seconds.
+        fast_json (bool): Use orjson for API payloads when it is installed.
+        fast_loop (bool): Run on uvloop when it is installed.
+        api_base (Optional[str]): A Bot API server base URL, e.g. a local Bot API server.
+    """
+    connection_limit: int = 200
+    keepalive_timeout: float = 60.0
+    request_timeout: float = 30.0
+    fast_json: bool = True
+    fast_loop: bool = True
+    api_base: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> 'RuntimeProfile':
+        """Builds the profile from BOT_* environment variables, falling back to defaults."""
+        defaults = cls()
+        return cls(
+            connection_limit=int(getenv('BOT_CONNECTION_LIMIT', defaults.connection_limit)),
+            keepalive_timeout=float(getenv('BOT_KEEPALIVE_TIMEOUT', defaults.keepalive_timeout)),
+            request_timeout=float(getenv('BOT_REQUEST_TIMEOUT', defaults.request_timeout)),
+            fast_json=_env_flag('BOT_FAST_JSON', defaults.fast_json),
+            fast_loop=_env_flag('BOT_FAST_LOOP', defaults.fast_loop),
+            api_base=getenv('BOT_API_BASE') or defaults.api_base,
+        )
+
+
+def json_codec(fast: bool = True) -> Tuple[Callable[..., Any], Callable[..., str]]:
+    """
+    Returns the JSON loader and dumper for API payloads.
+
+    Args:
+        fast (bool): Prefer orjson when it is installed.
+
+    Returns:
+        Tuple[Callable[..., Any], Callable[..., str]]: The ``loads`` and ``dumps`` functions.
+    """
+    if fast and orjson is not None:
+        return orjson.loads, lambda obj: orjson.dumps(obj).decode()
+    return json.loads, json.dumps
+
+
+class TunedAiohttpSession(AiohttpSession):
+    """
+    An AiohttpSession whose connection pool also keeps idle connections for ``keepalive_timeout``.
+
+    aiogram builds the aiohttp connector from the private ``_connector_init`` dict
+    (aiogram 3.13, pinned in requirements.txt); this class is the only place that
+    extends it and fails loudly if a future release removes it.
+    """
+
+    def __init__(self, keepalive_timeout: float, **kwargs: Any) -> None:
+        """
+        Args:
+            keepalive_timeout (float): Seconds an idle connection is kept open for reuse.
+            **kwargs (Any): Passed to ``AiohttpSession``.
+        """
+        self.keepalive_timeout = keepalive_timeout
+        super().__init__(**kwargs)
+        self._extend_connector_init()
+
+    def _extend_connector_init(self) -> None:
+        connector_init = getattr(self, '_connector_init', None)
+        if not isinstance(connector_init, dict):
+            raise RuntimeError('AiohttpSession no longer exposes _connector_init; update TunedAiohttpSession.')
+        connector_init['keepalive_timeout'] = self.keepalive_timeout
+
+    def _setup_proxy_connector(self, proxy: Any) -> None:
+        # Setting a proxy replaces the connector kwargs
+        super()._setup_proxy_connector(proxy)
+        self._extend_connector_init()
+
+
+def create_session(profile: RuntimeProfile) -> AiohttpSession:
+    """
+    Creates the Bot API client session described by the profile.
+
+    Args:
+        profile (RuntimeProfile): The runtime settings.
+
+    Returns:
+        AiohttpSession: The session to pass to ``Bot(session=...)``.
+    """
+    json_loads, json_dumps = json_codec(profile.fast_json)
+    kwargs = {'api': TelegramAPIServer.from_base(profile.api_base)} if profile.api_base else {}
+    return TunedAiohttpSession(
+        keepalive_timeout=profile.keepalive_timeout,
+        limit=profile.connection_limit,
+        timeout=profile.request_timeout,
+        json_loads=json_loads,
+        json_dumps=json_dumps,
+        **kwargs
+    )
+
+
+def run(main: Coroutine[Any, Any, Any], profile: RuntimeProfile) -> Any:
+    """
+    Runs the coroutine on uvloop when enabled and installed, otherwise on the stdlib loop.
+
+    Importing aiogram already makes uvloop the default policy when it is installed,
+    so the stdlib policy is restored explicitly when uvloop is disabled.
+
+    Args:
+        main (Coroutine): The entry point coroutine.
+        profile (RuntimeProfile): The runtime settings.
+
+    Returns:
+        Any: The coroutine result.
+    """
+    if profile.fast_loop and uvloop is not None:
+        logger.info('Running on uvloop.')
+        return uvloop.run(main)
+    asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
+    return asyncio.run(main)
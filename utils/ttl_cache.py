@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    A size-bounded LRU mapping whose entries expire after a time-to-live.
+
+    Once ``maxsize`` entries are stored, inserting a new key evicts the least recently
+    used one, so memory never grows past the cap. Expired entries are dropped lazily
+    when they are read or reach the LRU end.
+
+    Attributes:
+        maxsize (int): The maximum number of entries.
+        ttl (float): The number of seconds an entry stays valid after it is set.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self._data: 'OrderedDict[K, Tuple[float, V]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: K, default: Any = None) -> Any:
+        """
+        Returns the value for the key and marks it as recently used.
+
+        Args:
+            key (K): The key to look up.
+            default (Any): The value returned if the key is missing or expired.
+
+        Returns:
+            Any: The cached value or ``default``.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Stores the value, evicting the least recently used entries above ``maxsize``.
+
+        Args:
+            key (K): The key to store.
+            value (V): The value to store.
+            ttl (float, optional): A per-entry time-to-live. Defaults to the cache ``ttl``.
+        """
+        now = time.monotonic()
+        self._data[key] = (now + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        # Opportunistically drop an expired entry from the LRU end
+        oldest = next(iter(self._data))
+        if self._data[oldest][0] <= now:
+            del self._data[oldest]
+
+    def pop(self, key: K, default: Any = None) -> Any:
+        """
+        Removes the key and returns its value.
+
+        Args:
+            key (K): The key to remove.
+            default (Any): The value returned if the key is missing or expired.
+
+        Returns:
+            Any: The removed value or ``default``.
+        """
+        item = self._data.pop(key, None)
+        if item is None or item[0] <= time.monotonic():
+            return default
+        return item[1]
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        self._data.clear()